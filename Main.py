@@ -2,18 +2,13 @@ from stock.Stock import *
 from stock.EvalutateStock import *
 from database.PopulateDB import PopulateDB
 from HistoryAnalysis.DividendAnalysis import dividendAnalysis
-from PriceEstimators.PriceEstimationEarnings import PERatioEstimator
-from PriceEstimators.PriceEstimationEBIT import PEBITRatioEstimator
-from PriceEstimators.PriceEstimationOpCF import PriceOpCFRatioEstimator
-from PriceEstimators.PriceEstimationFCF import PriceFCFRatioEstimator
-from PriceEstimators.PriceEstimationDividend import PriceDividendRatioEstimator
 from stock.StockScreener import StockScreener
 import time, datetime
 from utils.Constants import DIVIDEND_SHEET_URL, DIVIDEND_COMPANY_FILE_PATH, FILTERED_DIVIDEND_COMPANY_FILE_PATH, HISTORICAL_PRICE_SHEET_URL, PRICE_HISTORY_FILE_PATH, DAILY_PRICE_SHEET_URL, PRICE_DAILY_FILE_PATH, CLEANED_PRICE_DAILY_FILE_PATH
 from utils.SaveDividendData import SaveDocsData
 from datetime import datetime
 import atexit
-from database.DatabaseConnection import db_connection
+from database.DatabaseConnection import close_db_connection
 
 def inspect_dividend_data():
     url = 'https://www.alphavantage.co/query?function=DIVIDENDS&symbol=GPC&apikey=WYGPKB8T21WMM6LO'
@@ -22,8 +17,6 @@ def inspect_dividend_data():
 
     print(data)
 
-# inspect_dividend_data()
-
 def inspect_income_statement():
     url = 'https://www.alphavantage.co/query?function=INCOME_STATEMENT&symbol=NUE&apikey=WYGPKB8T21WMM6LO'
     r = requests.get(url)
@@ -31,15 +24,11 @@ def inspect_income_statement():
 
     print(data)
 
-# inspect_income_statement()
-
 def save_dividend_paying_companies():
     save_dividend_data = SaveDocsData(DIVIDEND_SHEET_URL)
     save_dividend_data.save_data(DIVIDEND_COMPANY_FILE_PATH)
     save_dividend_data.process_data(DIVIDEND_COMPANY_FILE_PATH, FILTERED_DIVIDEND_COMPANY_FILE_PATH)
 
-# save_dividend_paying_companies()
-
 def populate_db():
     list_companies = pd.read_csv(FILTERED_DIVIDEND_COMPANY_FILE_PATH)
     list_companies = list_companies['Symbol'].tolist()
@@ -56,7 +45,7 @@ def create_excel_file():
     filtered_sorted_companies = pd.read_csv(FILTERED_DIVIDEND_COMPANY_FILE_PATH)
     tickers = filtered_sorted_companies['Symbol'].tolist()
 
-    results = screener.screen_stocks(tickers)
+    results = screener.screen_stocks(tickers, max_workers=None, engine="process")
     all_results.update(results)
 
     screening_end_time = time.time()
@@ -74,8 +63,6 @@ def create_excel_file():
             except Exception as e:
                 print(f"Error plotting dividend sustainability for {ticker}: {e}")
 
-# create_excel_file()
-
 def analyze_specific_companies():
     tickers = ["TROW", "PEP", "REXR", "DEO", "HRL", "BF.B", "ARE", "RHI", "NKE", "SWKS", "TGT", "UPS", "NUE", "TTC", "O", "CBU", "OZK", "PII", "SCVL", "HPQ", "COP", "SWK", "SCL", "MDT", "WST", "MRK", "PLD", "SJW"]
     results = {}
@@ -94,4 +81,12 @@ def analyze_specific_companies():
         except Exception as e:
             print(f"Error plotting dividend sustainability for {ticker}: {e}")
 
-atexit.register(db_connection.close_connection)
+# The screening workers may be started with spawn (Windows, macOS), which imports this module again in
+# every worker: the jobs run only when Main.py is executed, not when it is imported
+if __name__ == "__main__":
+    atexit.register(close_db_connection)
+
+    # inspect_dividend_data()
+    # inspect_income_statement()
+    # save_dividend_paying_companies()
+    # create_excel_file()
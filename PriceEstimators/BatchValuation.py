@@ -0,0 +1,74 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+from datetime import datetime
+import numpy as np
+import database.DatabaseCRUD as db
+from stock.Stock import Stock
+from stock.FinancialSnapshot import FinancialSnapshot
+from PriceEstimators.CombinedPriceEngine import (CombinedPriceEngine, ESTIMATION_METHODS, HISTORY_RECORDS,
+                                                 estimate_price_multiples, stack_inputs, summarize_estimates)
+
+# Records read by the estimations (the history of the multiples and the current EPS, OpCF/share, FCF/share)
+VALUATION_RECORDS = sorted({record_type for _, record_type in HISTORY_RECORDS.values()} | {'operatingCashFow'})
+
+class BatchValuation:
+    """
+    Multiple-based price estimations for a whole list of tickers.
+
+    The statements, the yearly average prices and the last prices of all the tickers are read with
+    three bulk queries, then the P/E, P/EBIT, P/OpCF, P/FCF and P/Dividend estimations of the
+    whole cross-section are computed at once by the CombinedPriceEngine array functions.
+    """
+    def __init__(self, db_crud=None, start_year=2013, end_year=2023):
+        self.db_crud = db_crud if db_crud is not None else db.DatabaseCRUD()
+        self.engine = CombinedPriceEngine(start_year, end_year)
+
+    # Stocks with their snapshot and last price preloaded, plus the yearly prices (years x tickers)
+    def _load(self, tickers):
+        engine = self.engine
+        # the current EPS, OpCF/share and FCF/share are computed by Stock for the year now - 2
+        metrics_year = datetime.now().year - 2
+        snapshots = self.db_crud.select_financial_snapshots(
+            tickers, min(engine.start_year, metrics_year), max(engine.end_year, metrics_year), VALUATION_RECORDS)
+        last_prices = self.db_crud.get_last_prices(tickers)
+        annual_prices = self.db_crud.get_average_year_prices_for_tickers(tickers, engine.start_year, engine.end_year)
+
+        stocks = []
+        for ticker in tickers:
+            company_id, rows = snapshots.get(ticker.upper(), (None, []))
+            stock = Stock(ticker, self.db_crud)
+            stock.preload(FinancialSnapshot(company_id, rows), last_prices.get(ticker.upper()))
+            stocks.append(stock)
+        return stocks, annual_prices
+
+    def estimate(self, tickers):
+        """
+        DataFrame indexed by ticker with the last 'Price', the estimation of every method
+        (NaN where it could not be computed) and their 'average' (0 if none could be computed).
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            empty = np.zeros((0, len(ESTIMATION_METHODS)))
+            df = summarize_estimates([], empty, empty.astype(bool))
+            df.insert(0, 'Price', [])
+            return df
+
+        stocks, annual_prices = self._load(tickers)
+        per_stock = [
+            self.engine.stock_inputs(stock, annual_prices[stock.ticker].to_numpy(dtype=np.float64))
+            for stock in stocks
+        ]
+        inputs = stack_inputs(per_stock)
+        estimates, failed = estimate_price_multiples(inputs)
+        df = summarize_estimates(tickers, estimates, failed)
+        df.insert(0, 'Price', inputs['latest_price'])
+        return df
+
+if __name__ == "__main__":
+    valuation = BatchValuation()
+    universe = valuation.db_crud.select_all_company_tickers()
+    start = time.perf_counter()
+    estimates = valuation.estimate(universe)
+    print(estimates)
+    print(f"Valued {len(universe)} stocks in {time.perf_counter() - start:.2f} s")
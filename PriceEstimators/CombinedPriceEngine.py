@@ -0,0 +1,228 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+from stock.Stock import Stock
+from utils.SafeDivide import safe_divide
+
+ESTIMATION_METHODS = ['P/E', 'P/EBIT', 'P/OpCF', 'P/FCF', 'P/Dividend']
+
+# (statement_type, record_type) of every yearly history needed by the estimation methods
+HISTORY_RECORDS = {
+    'netIncome': ('income_statement', 'netIncome'),
+    'ebit': ('income_statement', 'ebit'),
+    'sharesOutstanding': ('balance_sheet', 'sharesOutstanding'),
+    'operatingCashFlow': ('cash_flow_statement', 'operatingCashFlow'),
+    'capitalExpenditures': ('cash_flow_statement', 'capitalExpenditures'),
+    'dividendPayout': ('cash_flow_statement', 'dividendPayout'),
+}
+
+_is_none = np.frompyfunc(lambda value: value is None, 1, 1)
+_is_number = np.frompyfunc(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool), 1, 1)
+_to_float = np.frompyfunc(lambda value: float(value) if isinstance(value, (int, float)) else np.nan, 1, 1)
+
+class RawValues:
+    """
+    Values read from the financialData table, aligned as tickers x years: numbers, None when the
+    statement/record is missing, or text ('None') that makes the computation fail.
+    """
+    def __init__(self, raw):
+        raw = np.asarray(raw, dtype=object)
+        self.missing = _is_none(raw).astype(bool)
+        self.invalid = ~self.missing & ~_is_number(raw).astype(bool)
+        self.values = _to_float(raw).astype(np.float64)
+
+def _per_share(amount, shares):
+    """
+    safe_divide(amount, shares) element by element: 0 when one of them is missing or shares is 0,
+    a failure when one of them is text. Returns (values, failed per ticker).
+    """
+    zero = amount.missing | shares.missing | (shares.values == 0)
+    failed = ~zero & (amount.invalid | shares.invalid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(zero | failed, 0.0, amount.values / shares.values)
+    return values, failed.any(axis=1)
+
+# Mean over the years, summed in year order
+def _sequential_mean(values):
+    total = np.zeros(values.shape[0])
+    for column in range(values.shape[1]):
+        total = total + values[:, column]
+    return total / values.shape[1]
+
+def _historic_price_multiple(prices, per_share):
+    """
+    Average of price / per_share over the years (0 for the years where per_share is 0).
+    Fails when a year has no price, or when per_share is 0 in every year (the historic multiple
+    is then 0 and the estimate would divide by it).
+    """
+    zero = per_share == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(zero, 0.0, prices / per_share)
+    failed = np.isnan(prices).any(axis=1) | zero.all(axis=1)
+    return _sequential_mean(ratios), failed
+
+def _estimate_from_multiple(latest_price, current_per_share, historic_multiple):
+    """
+    Current price / (current multiple / historic multiple), with the denominator set to 1.5 when negative.
+    latest_price is NaN when the ticker has no price (the estimate is then 0, like safe_divide(None, ...)).
+    """
+    no_price = np.isnan(latest_price)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_multiple = np.where(no_price | (current_per_share == 0), 0.0, latest_price / current_per_share)
+        denominator = current_multiple / historic_multiple
+        denominator = np.where(denominator < 0, 1.5, denominator)
+        return np.where(no_price | (denominator == 0), 0.0, latest_price / denominator)
+
+def _estimate_from_dividend_yield(latest_price, current_dividend_per_share, historic_yield):
+    """Current price / (historic yield / current yield), with the denominator set to 1.5 when negative"""
+    no_price = np.isnan(latest_price)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_yield = np.where(no_price | (latest_price == 0), 0.0, current_dividend_per_share / latest_price)
+        denominator = np.where(current_yield == 0, 0.0, historic_yield / current_yield)
+        denominator = np.where(denominator < 0, 1.5, denominator)
+        return np.where(no_price | (denominator == 0), 0.0, latest_price / denominator)
+
+def estimate_price_multiples(inputs):
+    """
+    Price estimations of a cross-section of tickers with the five multiples, computed with array operations.
+
+    inputs - dict with
+        history records (HISTORY_RECORDS keys) - raw values, tickers x years
+        'prices'          - average close price of every year, tickers x years (NaN when missing)
+        'latest_price'    - last close price per ticker (NaN when missing)
+        'eps', 'op_cf_per_share', 'fcf_per_share' - current values, as computed by Stock
+        'last_ebit', 'last_dividend', 'last_shares' - raw values of the last year, tickers x 1
+
+    Returns (estimates, failed), both tickers x ESTIMATION_METHODS.
+    """
+    shares = RawValues(inputs['sharesOutstanding'])
+    prices = np.asarray(inputs['prices'], dtype=np.float64)
+    latest_price = np.asarray(inputs['latest_price'], dtype=np.float64)
+    n_tickers = prices.shape[0]
+    estimates = np.zeros((n_tickers, len(ESTIMATION_METHODS)))
+    failed = np.zeros((n_tickers, len(ESTIMATION_METHODS)), dtype=bool)
+
+    # P/E, P/EBIT and P/OpCF: yearly record per share
+    last_shares = RawValues(inputs['last_shares'])
+    last_ebit_per_share, last_ebit_failed = _per_share(RawValues(inputs['last_ebit']), last_shares)
+    operating_cash_flow = RawValues(inputs['operatingCashFlow'])
+    for column, record, current_per_share, extra_failed in (
+        (0, RawValues(inputs['netIncome']), inputs['eps'], None),
+        (1, RawValues(inputs['ebit']), last_ebit_per_share[:, 0], last_ebit_failed),
+        (2, operating_cash_flow, inputs['op_cf_per_share'], None),
+    ):
+        per_share, per_share_failed = _per_share(record, shares)
+        historic, historic_failed = _historic_price_multiple(prices, per_share)
+        estimates[:, column] = _estimate_from_multiple(latest_price, np.asarray(current_per_share, dtype=np.float64), historic)
+        failed[:, column] = per_share_failed | historic_failed
+        if extra_failed is not None:
+            failed[:, column] |= extra_failed
+
+    # P/FCF: operating cash flow - capital expenditures, every year needs both values
+    capital_expenditures = RawValues(inputs['capitalExpenditures'])
+    fcf_failed = (operating_cash_flow.missing | operating_cash_flow.invalid |
+                  capital_expenditures.missing | capital_expenditures.invalid).any(axis=1)
+    fcf = RawValues(np.where(fcf_failed[:, None], 0.0, operating_cash_flow.values - capital_expenditures.values))
+    per_share, per_share_failed = _per_share(fcf, shares)
+    historic, historic_failed = _historic_price_multiple(prices, per_share)
+    estimates[:, 3] = _estimate_from_multiple(latest_price, np.asarray(inputs['fcf_per_share'], dtype=np.float64), historic)
+    failed[:, 3] = fcf_failed | per_share_failed | historic_failed
+
+    # P/Dividend: dividend yield of every year
+    dividends_per_share, dividends_failed = _per_share(RawValues(inputs['dividendPayout']), shares)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yields = np.where(prices == 0, 0.0, dividends_per_share / prices)
+    historic_yield = _sequential_mean(yields)
+    last_dividend_per_share, last_dividend_failed = _per_share(RawValues(inputs['last_dividend']), last_shares)
+    estimates[:, 4] = _estimate_from_dividend_yield(latest_price, last_dividend_per_share[:, 0], historic_yield)
+    failed[:, 4] = dividends_failed | np.isnan(prices).any(axis=1) | last_dividend_failed
+
+    return estimates, failed
+
+# Stack the inputs of every stock (CombinedPriceEngine.stock_inputs) into the arrays of estimate_price_multiples
+def stack_inputs(per_stock):
+    inputs = {}
+    for key in per_stock[0]:
+        values = [stock_inputs[key] for stock_inputs in per_stock]
+        inputs[key] = np.array(values, dtype=object) if key in HISTORY_RECORDS or key.startswith('last_') \
+            else np.array(values, dtype=np.float64)
+    return inputs
+
+def summarize_estimates(tickers, estimates, failed):
+    """DataFrame ticker x (ESTIMATION_METHODS + 'average'), NaN where a method could not be computed"""
+    valid = ~failed
+    counts = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average = np.where(counts > 0, np.where(valid, estimates, 0.0).sum(axis=1) / counts, 0.0)
+    df = pd.DataFrame(np.where(failed, np.nan, estimates), index=list(tickers), columns=ESTIMATION_METHODS)
+    df['average'] = average
+    df.index.name = 'ticker'
+    return df
+
+class CombinedPriceEngine:
+    """
+    Computes the five multiple-based price estimations of a stock in one pass: the statements,
+    the yearly prices and the last price are loaded once and every multiple is computed over
+    year-aligned arrays.
+    """
+    def __init__(self, start_year=2013, end_year=2023):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.years = list(range(start_year, end_year + 1))
+
+    # History records of one stock, read from its snapshot.
+    # annual_prices - average close of every year aligned to self.years, loaded from the database if None
+    def stock_inputs(self, stock, annual_prices=None):
+        snapshot = stock.snapshot
+        inputs = {}
+        for name, (statement_type, record_type) in HISTORY_RECORDS.items():
+            inputs[name] = [snapshot.get(statement_type, year, record_type) for year in self.years]
+        # the misspelled record is used only when operatingCashFlow is missing
+        inputs['operatingCashFlow'] = [
+            value if value is not None else snapshot.get('cash_flow_statement', year, 'operatingCashFow')
+            for year, value in zip(self.years, inputs['operatingCashFlow'])
+        ]
+        inputs['last_ebit'] = [snapshot.get('income_statement', self.end_year, 'ebit')]
+        inputs['last_dividend'] = [snapshot.get('cash_flow_statement', self.end_year, 'dividendPayout')]
+        inputs['last_shares'] = [snapshot.get('balance_sheet', self.end_year, 'sharesOutstanding')]
+
+        if annual_prices is None:
+            annual_average = stock.metric('get_average_year_prices', self.start_year, self.end_year)
+            if annual_average is None:
+                annual_prices = [np.nan] * len(self.years)
+            else:
+                annual_prices = annual_average['Close'].reindex(self.years).to_numpy(dtype=np.float64)
+        inputs['prices'] = annual_prices
+
+        latest_price = stock.get_latest_price()
+        inputs['latest_price'] = np.nan if latest_price is None else latest_price
+        inputs['eps'] = stock.metric('get_EPS')
+        inputs['op_cf_per_share'] = stock.metric('get_operating_cash_flow_per_share')
+        inputs['fcf_per_share'] = stock.metric('get_fcf_per_share')
+        return inputs
+
+    def _estimate_stocks(self, stocks):
+        return estimate_price_multiples(stack_inputs([self.stock_inputs(stock) for stock in stocks]))
+
+    # Breakdown of one stock: {method: estimated price or None, ..., 'average': average of the computed ones}
+    def estimate(self, ticker):
+        stock = ticker if isinstance(ticker, Stock) else Stock(ticker)
+        estimates, failed = self._estimate_stocks([stock])
+        breakdown = {
+            method: None if failed[0, column] else estimates[0, column]
+            for column, method in enumerate(ESTIMATION_METHODS)
+        }
+        values = [value for value in breakdown.values() if value is not None]
+        breakdown['average'] = safe_divide(sum(values), len(values)) if values else 0
+        return breakdown
+
+    # Breakdown of many tickers as a DataFrame ticker x (ESTIMATION_METHODS + 'average')
+    def estimate_many(self, tickers, db_crud=None):
+        tickers = list(tickers)
+        if not tickers:
+            return summarize_estimates([], np.zeros((0, len(ESTIMATION_METHODS))),
+                                       np.zeros((0, len(ESTIMATION_METHODS)), dtype=bool))
+        stocks = [Stock(ticker, db_crud) for ticker in tickers]
+        estimates, failed = self._estimate_stocks(stocks)
+        return summarize_estimates(tickers, estimates, failed)
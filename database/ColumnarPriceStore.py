@@ -0,0 +1,348 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import re
+import threading
+import time
+import numpy as np
+from utils.Constants import PRICE_STORE_DIR, USE_PRICE_STORE
+
+class ColumnarPriceStore:
+    """
+    Columnar copy of the price table, made for reading long histories fast.
+
+    calendar_<gen>.npy          - the dates present in the price table, sorted (datetime64[D])
+    closes/<company>_<gen>.npy  - float64 close prices of one company aligned to the calendar, NaN where
+                                  there is no price for that date
+    manifest.json               - generation, number of calendar dates in use (length), ticker -> company id,
+                                  file of every company and the last price.id / price_changes.id exported
+
+    The files are opened memory-mapped, so a date range is served as a zero-copy slice. They are allocated
+    with room for more dates after the last one: sync() writes the new dates and prices in place, only in the
+    files of the companies that have new prices, and the readers see them once the manifest (written last)
+    raises the length. A mapped file is never replaced: when a date lands inside the calendar or the room runs
+    out, sync() writes a new generation of files and the manifest switches to it. The older generations are
+    removed afterwards; on Windows a file that a reader still maps cannot be removed and is retried at the
+    next sync.
+    """
+    # the capacity of a new generation: length * GROWTH, with at least MIN_FREE_DATES free dates
+    GROWTH = 1.5
+    MIN_FREE_DATES = 260
+
+    def __init__(self, store_dir=PRICE_STORE_DIR):
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._manifest_mtime = None
+        self._calendar = None
+        self._closes = {}
+        # id(sqlite3 connection) -> (connection, state of the last is_synced check, its result)
+        self._synced_checks = {}
+
+    # relative paths are kept with '/' in the manifest
+    def _path(self, relative_path=""):
+        return os.path.join(self.store_dir, *relative_path.split("/"))
+
+    # ---------- reading ----------
+
+    # Read the manifest again if the store was synced since; the memory maps are reopened lazily
+    def _refresh(self, force=False):
+        try:
+            mtime = os.stat(self._path("manifest.json")).st_mtime_ns
+        except OSError:
+            self._manifest = None
+            return False
+        if force or mtime != self._manifest_mtime:
+            manifest = self._read_manifest()
+            # a store written before the generations is ignored until its next sync
+            self._manifest = manifest if manifest is not None and "generation" in manifest else None
+            self._calendar = None
+            self._closes = {}
+            self._manifest_mtime = mtime
+        return self._manifest is not None
+
+    def _load_array(self, relative_path):
+        return np.load(self._path(relative_path), mmap_mode="r")[:self._manifest["length"]]
+
+    # (calendar, closes of the ticker) from the same manifest; closes is None if the ticker is not exported
+    def _arrays(self, ticker=None):
+        for retry in (False, True):
+            if not self._refresh(force=retry):
+                return None, None
+            try:
+                if self._calendar is None:
+                    self._calendar = self._load_array(self._manifest["calendar"])
+                company_id = self._manifest["companies"].get(ticker.upper()) if ticker else None
+                if company_id is None:
+                    return self._calendar, None
+                if company_id not in self._closes:
+                    self._closes[company_id] = self._load_array(self._manifest["files"][str(company_id)])
+                return self._calendar, self._closes[company_id]
+            except FileNotFoundError:
+                # a sync switched to a new generation and removed the files of the manifest read before
+                if retry:
+                    raise
+
+    # True if every ticker is exported
+    def has_tickers(self, tickers):
+        with self._lock:
+            return self._refresh() and all(ticker.upper() in self._manifest["companies"] for ticker in tickers)
+
+    # True if every change of the price table seen by the cursor was exported.
+    # The MAX(id) queries run again only when the manifest or the database changed since the last check on the
+    # same connection: PRAGMA data_version changes with the commits of the other connections and
+    # total_changes with the writes of this one.
+    def is_synced(self, cursor):
+        connection = cursor.connection
+        cursor.execute("PRAGMA data_version")
+        data_version = cursor.fetchone()[0]
+        with self._lock:
+            if not self._refresh():
+                return False
+            state = (self._manifest_mtime, data_version, connection.total_changes)
+            checked = self._synced_checks.get(id(connection))
+            if checked is not None and checked[0] is connection and checked[1] == state:
+                return checked[2]
+            last_price_id = self._manifest["last_price_id"]
+            last_change_id = self._manifest["last_change_id"]
+        cursor.execute("""
+            SELECT (SELECT IFNULL(MAX(id), 0) FROM price), (SELECT IFNULL(MAX(id), 0) FROM price_changes)
+        """)
+        max_price_id, max_change_id = cursor.fetchone()
+        synced = max_price_id <= last_price_id and max_change_id <= last_change_id
+        with self._lock:
+            # the connections closed since are forgotten from time to time
+            if len(self._synced_checks) >= 64:
+                self._synced_checks.clear()
+            self._synced_checks[id(connection)] = (connection, state, synced)
+        return synced
+
+    def calendar(self):
+        with self._lock:
+            return self._arrays()[0]
+
+    # Memory-mapped close prices of a ticker, aligned to calendar(); None if the ticker is not exported
+    def closes(self, ticker):
+        with self._lock:
+            return self._arrays(ticker)[1]
+
+    # (dates, closes) between start_date and end_date inclusive, as views over the memory-mapped files.
+    # The closes are NaN on the dates where the ticker has no price.
+    def get_prices(self, ticker, start_date, end_date):
+        with self._lock:
+            calendar, closes = self._arrays(ticker)
+        if closes is None:
+            return None
+        start = np.searchsorted(calendar, np.datetime64(start_date, "D"), side="left")
+        end = np.searchsorted(calendar, np.datetime64(end_date, "D"), side="right")
+        return calendar[start:end], closes[start:end]
+
+    def get_last_price(self, ticker):
+        closes = self.closes(ticker)
+        if closes is None:
+            return None
+        valid = np.flatnonzero(~np.isnan(closes))
+        if valid.size == 0:
+            return None
+        return float(closes[valid[-1]])
+
+    # ---------- exporting ----------
+
+    # Export the price changes made since the last sync. Returns the number of rows exported.
+    def sync(self, connection, rebuild=False):
+        with self._lock:
+            # drop this store's own maps before touching the files
+            self._manifest, self._manifest_mtime, self._calendar, self._closes = None, None, None, {}
+            os.makedirs(self._path("closes"), exist_ok=True)
+            manifest = self._read_manifest()
+            with connection.get_cursor() as cursor:
+                if rebuild or manifest is None or "generation" not in manifest:
+                    return self._export_generation(cursor)
+                return self._export_changes(cursor, manifest)
+
+    # Write every price into a new generation of files
+    def _export_generation(self, cursor):
+        # read before the prices: a change made in between is exported again at the next sync
+        cursor.execute("SELECT IFNULL(MAX(id), 0) FROM price_changes")
+        last_change_id = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT p.id, p.company_id, UPPER(c.ticker), p.date, p.close
+            FROM price p
+            JOIN company c ON c.id = p.company_id
+        """)
+        rows = cursor.fetchall()
+        price_ids, company_ids, tickers, dates, closes = self._columns(rows)
+
+        generation = self._next_generation()
+        calendar = np.unique(dates)
+        capacity = max(calendar.size + self.MIN_FREE_DATES, int(calendar.size * self.GROWTH))
+        manifest = {
+            "generation": generation,
+            "length": int(calendar.size),
+            "capacity": capacity,
+            "calendar": f"calendar_{generation}.npy",
+            "companies": {},
+            "files": {},
+            "last_price_id": int(price_ids.max()) if price_ids.size else 0,
+            "last_change_id": last_change_id,
+        }
+        self._write_companies(manifest, company_ids, tickers, np.searchsorted(calendar, dates), closes)
+        padded_calendar = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[D]")
+        padded_calendar[:calendar.size] = calendar
+        np.save(self._path(manifest["calendar"]), padded_calendar)
+        # the manifest is written last, readers switch to the new generation only after it changes
+        self._save_manifest(manifest)
+        self._remove_old_generations(manifest)
+        return len(rows)
+
+    # Write in place the prices added, updated or deleted since the last sync
+    def _export_changes(self, cursor, manifest):
+        # the changes are read first and the new prices after them, so the new prices win for the same date
+        cursor.execute("""
+            SELECT ch.id, ch.company_id, UPPER(c.ticker), ch.date, p.close
+            FROM price_changes ch
+            LEFT JOIN company c ON c.id = ch.company_id
+            LEFT JOIN price p ON p.company_id = ch.company_id AND p.date = ch.date
+            WHERE ch.id > ?
+            ORDER BY ch.id
+        """, (manifest["last_change_id"],))
+        changes = cursor.fetchall()
+        cursor.execute("""
+            SELECT p.id, p.company_id, UPPER(c.ticker), p.date, p.close
+            FROM price p
+            JOIN company c ON c.id = p.company_id
+            WHERE p.id > ?
+        """, (manifest["last_price_id"],))
+        additions = cursor.fetchall()
+        if not changes and not additions:
+            return 0
+
+        # the changes of a company deleted since are skipped
+        rows = [row for row in changes if row[2] is not None] + additions
+        _, company_ids, tickers, dates, closes = self._columns(rows)
+        length = manifest["length"]
+        calendar = np.load(self._path(manifest["calendar"]))[:length]
+
+        # the last row of a (company, date) is its current value; a deleted price on an unknown date is skipped
+        keys = company_ids * 1_000_000 + (dates.astype(np.int64) + 500_000)
+        _, last = np.unique(keys[::-1], return_index=True)
+        latest = np.sort(keys.size - 1 - last)
+        latest = latest[~np.isnan(closes[latest]) | np.isin(dates[latest], calendar)]
+        company_ids, tickers, dates, closes = company_ids[latest], tickers[latest], dates[latest], closes[latest]
+
+        new_dates = np.setdiff1d(dates, calendar)
+        if new_dates.size:
+            if (length and new_dates[0] <= calendar[-1]) or length + new_dates.size > manifest["capacity"]:
+                # a date inside the calendar or no room left: every array is realigned in a new generation
+                return self._export_generation(cursor)
+            calendar = np.concatenate([calendar, new_dates])
+            self._write_in_place(manifest["calendar"], slice(length, calendar.size), new_dates)
+
+        self._write_companies(manifest, company_ids, tickers, np.searchsorted(calendar, dates), closes)
+        manifest["length"] = int(calendar.size)
+        if additions:
+            manifest["last_price_id"] = max(manifest["last_price_id"], max(row[0] for row in additions))
+        if changes:
+            manifest["last_change_id"] = changes[-1][0]
+        self._save_manifest(manifest)
+        # files of an older generation that were still mapped at the previous sync
+        self._remove_old_generations(manifest)
+        return len(rows)
+
+    @staticmethod
+    def _columns(rows):
+        if not rows:
+            return (np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=object),
+                    np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64))
+        price_ids, company_ids, tickers, dates, closes = zip(*rows)
+        return (np.array(price_ids, dtype=np.int64), np.array(company_ids, dtype=np.int64),
+                np.array(tickers, dtype=object), np.array(dates, dtype="datetime64[D]"),
+                np.array([np.nan if close is None else close for close in closes], dtype=np.float64))
+
+    # Write the closes at the given calendar positions, company by company. The files of the current
+    # generation are updated in place; a company without a file gets a new one.
+    def _write_companies(self, manifest, company_ids, tickers, positions, closes):
+        if company_ids.size == 0:
+            return
+        order = np.argsort(company_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(company_ids[order])) + 1
+        for group in np.split(order, boundaries):
+            company_id = int(company_ids[group[0]])
+            relative_path = manifest["files"].get(str(company_id))
+            if relative_path is None:
+                relative_path = f"closes/{company_id}_{manifest['generation']}.npy"
+                company_closes = np.full(manifest["capacity"], np.nan)
+                company_closes[positions[group]] = closes[group]
+                np.save(self._path(relative_path), company_closes)
+                manifest["files"][str(company_id)] = relative_path
+            else:
+                self._write_in_place(relative_path, positions[group], closes[group])
+            manifest["companies"][tickers[group[0]]] = company_id
+
+    # Readers only look at the first `length` values, so the values written after them stay invisible
+    # until the manifest changes; a value inside them is a single float64 overwritten in place
+    def _write_in_place(self, relative_path, positions, values):
+        array = np.lib.format.open_memmap(self._path(relative_path), mode="r+")
+        array[positions] = values
+        array.flush()
+        del array
+
+    def _next_generation(self):
+        generations = [int(match.group(1)) for match in
+                       (re.fullmatch(r"calendar_(\d+)\.npy", name) for name in os.listdir(self._path()))
+                       if match]
+        return max(generations, default=0) + 1
+
+    # Remove every calendar/closes file the manifest does not point to (older generations and the files
+    # of the format without generations). A file still mapped on Windows is left for the next sync.
+    def _remove_old_generations(self, manifest):
+        current = {manifest["calendar"], *manifest["files"].values()}
+        candidates = [name for name in os.listdir(self._path()) if re.fullmatch(r"calendar(_\d+)?\.npy", name)]
+        candidates += [f"closes/{name}" for name in os.listdir(self._path("closes")) if name.endswith(".npy")]
+        for relative_path in candidates:
+            if relative_path not in current:
+                try:
+                    os.remove(self._path(relative_path))
+                except OSError:
+                    pass
+
+    def _read_manifest(self):
+        try:
+            with open(self._path("manifest.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest):
+        tmp_path = self._path("manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        # on Windows the replace fails while a reader has the manifest open, which only lasts a moment
+        for attempt in range(10):
+            try:
+                os.replace(tmp_path, self._path("manifest.json"))
+                return
+            except PermissionError:
+                if attempt == 9:
+                    raise
+                time.sleep(0.05)
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+# The store of the default database shared by every DatabaseCRUD created without an explicit connection,
+# None when USE_PRICE_STORE is off
+def get_price_store():
+    global _default_store
+    if not USE_PRICE_STORE:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ColumnarPriceStore()
+        return _default_store
+
+if __name__ == "__main__":
+    from database.DatabaseConnection import db_connection
+    exported = ColumnarPriceStore().sync(db_connection)
+    print(f"Exported {exported} prices to the columnar price store")
@@ -0,0 +1,77 @@
+import queue
+import threading
+from contextlib import contextmanager
+from utils.Constants import DB_MAX_READERS
+from database.DatabaseConnection import DatabaseConnection, ReadOnlyConnection
+
+class ConnectionPool:
+    """
+    One writer connection (the process-wide DatabaseConnection) and up to max_readers
+    read-only WAL connections (ReadOnlyConnection), created when they are first needed.
+
+    A thread holds a reader only while it reads: reader() hands out an idle connection
+    (waiting if all max_readers are in use) and takes it back at the end of the block.
+    Nested reader() blocks in the same thread reuse the connection already held.
+    """
+    def __init__(self, writer=None, max_readers=DB_MAX_READERS, db_name=None):
+        self.writer = writer if writer is not None else DatabaseConnection()
+        self.max_readers = max_readers
+        self.db_name = db_name
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def reader(self):
+        held = getattr(self._local, 'reader', None)
+        if held is not None:
+            yield held
+            return
+        reader = self._acquire()
+        self._local.reader = reader
+        try:
+            yield reader
+        finally:
+            self._local.reader = None
+            self._idle.put(reader)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.max_readers
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        try:
+            return ReadOnlyConnection(self.db_name)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    # Close the idle readers; the ones in use are closed when they are given back and the pool is closed again
+    def close(self):
+        while True:
+            try:
+                reader = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            reader.close_connection()
+            with self._lock:
+                self._created -= 1
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+# The pool shared by every DatabaseCRUD created without an explicit connection
+def get_connection_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
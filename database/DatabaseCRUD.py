@@ -1,17 +1,93 @@
 import sqlite3
+import numpy as np
+import pandas as pd
 from datetime import datetime
-from database.DatabaseConnection import db_connection
-from threading import Lock
+from database.ConnectionPool import get_connection_pool
+from database.ColumnarPriceStore import get_price_store
+from database.models.Price import prepare_price_rows
+from database.Fundamentals import refresh_fundamentals, quote_column, FUNDAMENTAL_RECORD_TYPES
+from contextlib import contextmanager
+import threading
+
+# Monthly/yearly mean or last close of a daily price matrix (dates x tickers)
+def resample_price_matrix(matrix, freq='D', how='last'):
+    if freq == 'D':
+        return matrix
+    if how not in ('last', 'mean'):
+        raise ValueError(f"Unknown aggregation '{how}', expected 'last' or 'mean'")
+    if freq == 'M':
+        periods = matrix.index.to_period('M').to_timestamp()
+    elif freq == 'Y':
+        periods = matrix.index.year
+    else:
+        raise ValueError(f"Unknown frequency '{freq}', expected 'D', 'M' or 'Y'")
+    grouped = matrix.groupby(periods)
+    resampled = grouped.last() if how == 'last' else grouped.mean()
+    resampled.index.name = 'Date'
+    return resampled
+
+# (year, record_type, record_value) rows -> float64 DataFrame year x record_types; NULL and text values become NaN
+def pivot_financial_rows(rows, record_types):
+    record_types = list(record_types)
+    if not rows:
+        return pd.DataFrame(np.empty((0, len(record_types))), index=pd.Index([], dtype=np.int64, name='year'),
+                            columns=record_types)
+    years, row_types, values = zip(*rows)
+    values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+    year_index, year_positions = np.unique(np.array(years, dtype=np.int64), return_inverse=True)
+    column_positions = pd.Index(record_types).get_indexer(row_types)
+    block = np.full((year_index.size, len(record_types)), np.nan)
+    block[year_positions, column_positions] = values
+    return pd.DataFrame(block, index=pd.Index(year_index, name='year'), columns=record_types)
+
+# numpy scalars (e.g. from a numeric DataFrame) cannot be bound by sqlite3
+def _to_sql_value(value):
+    return value.item() if hasattr(value, 'item') else value
 
 class DatabaseCRUD:
-    def __init__(self):
-        self.connection = db_connection
+    # Without an explicit connection the writes go to the writer connection of the pool and the reads
+    # to its read-only connections; with one (e.g. a ReadOnlyConnection of a worker) everything uses it.
+    def __init__(self, connection=None, price_store=None, pool=None):
+        if connection is None:
+            self.pool = pool if pool is not None else get_connection_pool()
+            self.connection = self.pool.writer
+        else:
+            self.pool = pool
+            self.connection = connection
+        # ColumnarPriceStore serving the price reads while it is in sync with the price table; without an
+        # explicit connection (the default database) it is the shared store, when USE_PRICE_STORE is on
+        if price_store is None and connection is None:
+            price_store = get_price_store()
+        self.price_store = price_store
         print(f"[DEBUG] Using connection in DatabaseCRUD: {id(self.connection)}")
-        self._lock = Lock()
+        # the writes of every DatabaseCRUD sharing the connection are serialized by the write lock
+        # taken in connection.write_scope(); the reads never take it
+
+    # Group many CRUD calls in one transaction committed at the end of the block:
+    #     with db_crud.transaction():
+    #         db_crud.insert_price(...)
+    #         with db_crud.transaction():   # nested block = savepoint
+    #             ...
+    # An exception rolls back the writes of the block in which it was raised.
+    # Every write method runs in its own savepoint: a write that fails (and returns 0/None/False)
+    # undoes only its own statements, the previous writes of the block are kept.
+    def transaction(self):
+        return self.connection.transaction()
+
+    # Cursor for the read queries: a read-only connection of the pool when there is one.
+    # Inside a transaction the reads use the writer, so they see the writes not committed yet.
+    @contextmanager
+    def _read_cursor(self):
+        if self.pool is None or self.connection.in_transaction():
+            with self.connection.get_cursor() as cursor:
+                yield cursor
+        else:
+            with self.pool.reader() as reader, reader.get_cursor() as cursor:
+                yield cursor
 
     def insert_company(self, ticker, sector):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO company(ticker, sector)
                     VALUES(?, ?)
@@ -19,35 +95,39 @@ class DatabaseCRUD:
                 self.connection.commit()
                 return cursor.lastrowid
         except sqlite3.IntegrityError:
+            self.connection.rollback()
             return self.select_company(ticker)
 
     def insert_financial_statement(self, ticker, statement_type, year):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 company_id = self.select_company(ticker)
                 if company_id:
                     cursor.execute("""
                         INSERT INTO financialStatement(company_id, statement_type, year)
                         VALUES(?, ?, ?)
-                    """, (company_id[0], statement_type, year))
+                    """, (company_id, statement_type, year))
+                    financial_statement_id = cursor.lastrowid
+                    refresh_fundamentals(cursor)
                     self.connection.commit()
-                    return cursor.lastrowid
+                    return financial_statement_id
         except sqlite3.IntegrityError:
+            self.connection.rollback()
             return self.select_financial_statement(company_id, statement_type, year)
 
     def insert_financial_data(self, ticker, statement_type, year, record_type, record_value):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 # get the company id
                 company_id = self.select_company(ticker)
+                if company_id is None:
+                    return None
 
-                # if company exists
-                if company_id:
-                    # get the financial statement id in which I want to insert the record
-                    cursor.execute("""
-                        SELECT id FROM financialStatement WHERE company_id = ? AND statement_type = ? AND year = ?
-                    """, (company_id[0], statement_type, year))
-                    financial_statement_id = cursor.fetchone()
+                # get the financial statement id in which I want to insert the record
+                cursor.execute("""
+                    SELECT id FROM financialStatement WHERE company_id = ? AND statement_type = ? AND year = ?
+                """, (company_id, statement_type, year))
+                financial_statement_id = cursor.fetchone()
 
                 # if financial statement exists insert the financial data into it
                 if financial_statement_id:
@@ -55,13 +135,89 @@ class DatabaseCRUD:
                         INSERT INTO financialData(financial_statement_id, record_type, record_value)
                         VALUES(?, ?, ?)
                     """, (financial_statement_id[0], record_type, record_value))
+                    financial_data_id = cursor.lastrowid
+                    refresh_fundamentals(cursor)
                     self.connection.commit()
-                    return cursor.lastrowid
+                    return financial_data_id
         except sqlite3.IntegrityError:
-            pass  # Ignore duplicate entries
+            self.connection.rollback()  # Ignore duplicate entries
+
+    def bulk_insert_financial_statements(self, statement_type, statements, overwrite=False):
+        """
+        Insert the statements of many companies in a single transaction.
+
+        statements - dict ticker -> DataFrame indexed by fiscal year, one column per record_type
+        overwrite  - False keeps the values already stored (INSERT OR IGNORE),
+                     True replaces them with the new ones (upsert)
+
+        Returns the number of financialData rows written, 0 if nothing was written.
+        """
+        statements = {ticker: df for ticker, df in statements.items() if df is not None and not df.empty}
+        if not statements:
+            return 0
+
+        if overwrite:
+            data_query = """
+                INSERT INTO financialData(financial_statement_id, record_type, record_value)
+                VALUES(?, ?, ?)
+                ON CONFLICT(financial_statement_id, record_type) DO UPDATE SET record_value = excluded.record_value
+            """
+        else:
+            data_query = """
+                INSERT OR IGNORE INTO financialData(financial_statement_id, record_type, record_value)
+                VALUES(?, ?, ?)
+            """
+
+        try:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
+                company_ids = self._select_company_ids(cursor, list(statements))
+
+                rows_written = 0
+                for ticker, df in statements.items():
+                    company_id = company_ids.get(ticker.upper())
+                    if company_id is None:
+                        print(f"Company {ticker} not found in the database")
+                        continue
+
+                    years = [int(year) for year in df.index]
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO financialStatement(company_id, statement_type, year)
+                        VALUES(?, ?, ?)
+                    """, [(company_id, statement_type, year) for year in years])
+
+                    # the ids of all the statements of this company, including the ones that already existed
+                    cursor.execute("""
+                        SELECT year, id FROM financialStatement WHERE company_id = ? AND statement_type = ?
+                    """, (company_id, statement_type))
+                    statement_ids = dict(cursor.fetchall())
+
+                    records = df.columns.tolist()
+                    data_rows = [
+                        (statement_ids[year], record_type, _to_sql_value(value))
+                        for year, values in zip(years, df.itertuples(index=False, name=None))
+                        for record_type, value in zip(records, values)
+                    ]
+                    cursor.executemany(data_query, data_rows)
+                    rows_written += len(data_rows)
+
+                refresh_fundamentals(cursor)
+                self.connection.commit()
+                return rows_written
+        except sqlite3.Error as e:
+            print(f"Error inserting {statement_type} in bulk: {e}")
+            self.connection.rollback()
+            return 0
+
+    def _select_company_ids(self, cursor, tickers):
+        """UPPER(ticker) -> company id for all the tickers, using a single query"""
+        placeholders = ','.join('?' for _ in tickers)
+        cursor.execute(f"""
+            SELECT UPPER(ticker), id FROM company WHERE UPPER(ticker) IN ({placeholders})
+        """, [ticker.upper() for ticker in tickers])
+        return dict(cursor.fetchall())
 
     def debug_database_content(self):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             # Get total count
             cursor.execute("SELECT COUNT(*) FROM company")
             count = cursor.fetchone()[0]
@@ -93,7 +249,7 @@ class DatabaseCRUD:
             print(f"LIKE search for GPC: {gpc_like}")
 
     def select_company(self, ticker):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             query = "SELECT id FROM company WHERE UPPER(ticker) = UPPER(?)"
             cursor.execute(query, (ticker,))
             result = cursor.fetchone()
@@ -105,7 +261,7 @@ class DatabaseCRUD:
             return result[0]
 
     def select_company_ticker(self, company_id):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             cursor.execute("""
                 SELECT ticker FROM company WHERE id = ?
             """, (company_id,))
@@ -116,7 +272,7 @@ class DatabaseCRUD:
             return result[0]
     
     def select_company_sector(self, ticker):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             cursor.execute("""
                 SELECT sector FROM company WHERE ticker = ?
             """, (ticker,))
@@ -127,7 +283,7 @@ class DatabaseCRUD:
             return result[0]
         
     def select_all_company_tickers(self):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             cursor.execute("""
                 SELECT ticker from company
             """)
@@ -138,7 +294,7 @@ class DatabaseCRUD:
             return [row[0] for row in result]
     
     def select_no_companies(self):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             cursor.execute("""
                 SELECT COUNT(*) FROM company
             """)
@@ -149,7 +305,7 @@ class DatabaseCRUD:
             return result[0]
     
     def select_financial_statement(self, company_id, statement_type, year):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             query = "SELECT id FROM financialStatement WHERE company_id = ? and statement_type = ? and year = ?"
             cursor.execute(query, (company_id, statement_type, year))
             result = cursor.fetchone()
@@ -158,7 +314,7 @@ class DatabaseCRUD:
             return result[0]
     
     def select_financial_data(self, financial_statement_id, record_type):
-        with self.connection.get_cursor() as cursor:
+        with self._read_cursor() as cursor:
             query = "SELECT record_value FROM financialData WHERE financial_statement_id = ? and record_type = ?"
             cursor.execute(query, (financial_statement_id, record_type))
             result = cursor.fetchone()
@@ -167,8 +323,223 @@ class DatabaseCRUD:
                 return None
             return result[0]
         
-    def select_financial_data_by_year_range(self, company_id, statement_type, start_year, end_year, record_types):
-        with self.connection.get_cursor() as cursor:
+    def select_financial_snapshot(self, company_id):
+        """Return every (year, statement_type, record_type, record_value) row stored for a company in one query"""
+        with self._read_cursor() as cursor:
+            cursor.execute("""
+                SELECT fs.year, fs.statement_type, fd.record_type, fd.record_value
+                FROM financialStatement fs
+                LEFT JOIN financialData fd ON fs.id = fd.financial_statement_id
+                WHERE fs.company_id = ?
+            """, (company_id,))
+            return cursor.fetchall()
+
+    def select_financial_snapshots(self, tickers, start_year=None, end_year=None, record_types=None):
+        """
+        UPPER(ticker) -> (company_id, rows) for many companies using a single query, rows in the format of
+        select_financial_snapshot. The statements can be limited to a year range and the records to a list
+        of record types (the statements without those records are still returned). Unknown tickers are left out.
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        placeholders = ','.join('?' for _ in tickers)
+        params = [ticker.upper() for ticker in tickers]
+        record_filter = ""
+        if record_types:
+            record_filter = f"AND fd.record_type IN ({','.join('?' for _ in record_types)})"
+        year_filter = ""
+        if start_year is not None and end_year is not None:
+            year_filter = "AND fs.year BETWEEN ? AND ?"
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT UPPER(c.ticker), c.id, fs.year, fs.statement_type, fd.record_type, fd.record_value
+                FROM company c
+                LEFT JOIN financialStatement fs ON fs.company_id = c.id {year_filter}
+                LEFT JOIN financialData fd ON fd.financial_statement_id = fs.id {record_filter}
+                WHERE UPPER(c.ticker) IN ({placeholders})
+            """, ([start_year, end_year] if year_filter else []) + list(record_types or []) + params)
+            rows = cursor.fetchall()
+
+        snapshots = {}
+        for ticker, company_id, year, statement_type, record_type, record_value in rows:
+            company_rows = snapshots.setdefault(ticker, (company_id, []))[1]
+            if year is not None:
+                company_rows.append((year, statement_type, record_type, record_value))
+        return snapshots
+
+    def select_latest_statement_years(self, tickers):
+        """
+        UPPER(ticker) -> {statement_type: latest fiscal year stored} for many companies using a single query.
+        Companies without statements map to an empty dict, unknown tickers are left out.
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        placeholders = ','.join('?' for _ in tickers)
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT UPPER(c.ticker), fs.statement_type, MAX(fs.year)
+                FROM company c
+                LEFT JOIN financialStatement fs ON fs.company_id = c.id
+                WHERE UPPER(c.ticker) IN ({placeholders})
+                GROUP BY c.id, fs.statement_type
+            """, [ticker.upper() for ticker in tickers])
+            rows = cursor.fetchall()
+
+        latest_years = {}
+        for ticker, statement_type, year in rows:
+            company_years = latest_years.setdefault(ticker, {})
+            if statement_type is not None:
+                company_years[statement_type] = year
+        return latest_years
+
+    def select_fundamentals(self, ticker, statement_type, record_types=None, start_year=None, end_year=None, as_array=False):
+        """
+        Typed history of a company from the fundamentals table, read with a single query: a float64 DataFrame
+        indexed by year with one column per record type (NaN where the record is missing or not a number).
+        as_array=True returns (years, record_types, values) with values a years x record_types NumPy block.
+        None if the company does not exist.
+        """
+        record_types = list(record_types) if record_types is not None else FUNDAMENTAL_RECORD_TYPES
+        unknown = [record_type for record_type in record_types if record_type not in FUNDAMENTAL_RECORD_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown record types {unknown}")
+        company_id = self.select_company(ticker)
+        if company_id is None:
+            return None
+        params = [company_id, statement_type]
+        year_filter = ""
+        if start_year is not None and end_year is not None:
+            year_filter = "AND year BETWEEN ? AND ?"
+            params += [start_year, end_year]
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT year, {', '.join(quote_column(record_type) for record_type in record_types)}
+                FROM fundamentals
+                WHERE company_id = ? AND statement_type = ? {year_filter}
+                ORDER BY year
+            """, params)
+            rows = cursor.fetchall()
+
+        block = np.array(rows, dtype=np.float64).reshape(len(rows), len(record_types) + 1)
+        years = block[:, 0].astype(np.int64)
+        values = block[:, 1:]
+        if as_array:
+            return years, record_types, values
+        return pd.DataFrame(values, index=pd.Index(years, name='year'), columns=record_types)
+
+    def select_statements_by_year_range(self, company_id, start_year, end_year, record_types):
+        """
+        Several statements of a company from the fundamentals table with a single query.
+
+        record_types - statement_type -> list of record types
+        Returns statement_type -> float64 DataFrame indexed by year with one column per record type
+        (NaN where missing); the years without any of the requested records are left out.
+        """
+        statement_types = list(record_types)
+        columns = list(dict.fromkeys(record_type for types in record_types.values() for record_type in types))
+        unknown = [record_type for record_type in columns if record_type not in FUNDAMENTAL_RECORD_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown record types {unknown}")
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT statement_type, year, {', '.join(quote_column(record_type) for record_type in columns)}
+                FROM fundamentals
+                WHERE company_id = ? AND year BETWEEN ? AND ?
+                    AND statement_type IN ({','.join('?' for _ in statement_types)})
+                ORDER BY year
+            """, [company_id, start_year, end_year] + statement_types)
+            rows = cursor.fetchall()
+
+        row_statements = np.array([row[0] for row in rows], dtype=object)
+        block = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(columns) + 1)
+        column_positions = {record_type: position + 1 for position, record_type in enumerate(columns)}
+        statements = {}
+        for statement_type, types in record_types.items():
+            values = block[row_statements == statement_type]
+            years = values[:, 0].astype(np.int64)
+            values = values[:, [column_positions[record_type] for record_type in types]]
+            has_data = ~np.isnan(values).all(axis=1)
+            statements[statement_type] = pd.DataFrame(values[has_data], index=pd.Index(years[has_data], name='year'),
+                                                      columns=list(types))
+        return statements
+
+    # Rebuild the fundamentals rows of the statements changed outside the DatabaseCRUD write methods
+    def refresh_fundamentals(self):
+        try:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
+                refreshed = refresh_fundamentals(cursor)
+                self.connection.commit()
+                return refreshed
+        except sqlite3.Error as e:
+            print(f"Error refreshing the fundamentals: {e}")
+            self.connection.rollback()
+            return 0
+
+    def select_sentiment_scores(self, content_hashes, model_name, chunk_size, overlap):
+        """
+        content_hash -> [(section, {"Negative": .., "Neutral": .., "Positive": ..}), ...] in document order,
+        for the documents already scored with this model and chunking, read with a single query.
+        """
+        content_hashes = list(set(content_hashes))
+        if not content_hashes:
+            return {}
+        placeholders = ','.join('?' for _ in content_hashes)
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT content_hash, section, negative, neutral, positive
+                FROM sentiment_section_scores
+                WHERE model_name = ? AND chunk_size = ? AND overlap = ? AND content_hash IN ({placeholders})
+                ORDER BY content_hash, position
+            """, [model_name, chunk_size, overlap] + content_hashes)
+            rows = cursor.fetchall()
+
+        scores = {}
+        for content_hash, section, negative, neutral, positive in rows:
+            scores.setdefault(content_hash, []).append(
+                (section, {"Negative": negative, "Neutral": neutral, "Positive": positive}))
+        return scores
+
+    def insert_sentiment_scores(self, model_name, chunk_size, overlap, scores):
+        """
+        Save the section scores of many documents in one transaction, replacing the previous scores
+        of the same document, model and chunking.
+
+        scores - dict content_hash -> [(section, {"Negative": .., "Neutral": .., "Positive": ..}), ...]
+
+        Returns the number of sections written, 0 if nothing was written.
+        """
+        rows = [
+            (content_hash, model_name, chunk_size, overlap, position, section,
+             sentiment["Negative"], sentiment["Neutral"], sentiment["Positive"])
+            for content_hash, sections in scores.items()
+            for position, (section, sentiment) in enumerate(sections)
+        ]
+        if not rows:
+            return 0
+        try:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
+                cursor.executemany("""
+                    DELETE FROM sentiment_section_scores
+                    WHERE content_hash = ? AND model_name = ? AND chunk_size = ? AND overlap = ?
+                """, [(content_hash, model_name, chunk_size, overlap) for content_hash in scores])
+                cursor.executemany("""
+                    INSERT INTO sentiment_section_scores(content_hash, model_name, chunk_size, overlap,
+                                                         position, section, negative, neutral, positive)
+                    VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                self.connection.commit()
+                return len(rows)
+        except sqlite3.Error as e:
+            print(f"Error inserting sentiment scores: {e}")
+            self.connection.rollback()
+            return 0
+
+    # as_frame=True returns a float64 DataFrame (year x record_types, NaN for the missing or 'None' values)
+    # pivoted with array operations instead of the {year: {record_type: raw value}} dict
+    def select_financial_data_by_year_range(self, company_id, statement_type, start_year, end_year, record_types, as_frame=False):
+        with self._read_cursor() as cursor:
             placeholders = ','.join('?' for _ in record_types)
             query = f"""
                 SELECT fs.year, fd.record_type, fd.record_value
@@ -181,10 +552,13 @@ class DatabaseCRUD:
                 ORDER BY fs.year
             """
 
-            params = [company_id, statement_type, start_year, end_year] + record_types
+            params = [company_id, statement_type, start_year, end_year] + list(record_types)
             cursor.execute(query, params)
             rows = cursor.fetchall()
 
+            if as_frame:
+                return pivot_financial_rows(rows, record_types)
+
             data = {}
             for year, record_type, value in rows:
                 if year not in data:
@@ -196,7 +570,7 @@ class DatabaseCRUD:
     def rename_column(self, old_column_name, new_column_name):
         """Rename a column in financialData table by updating record_type values"""
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 # Check if old column exists
                 check_query = """
                     SELECT COUNT(*) FROM financialData 
@@ -215,6 +589,7 @@ class DatabaseCRUD:
                     WHERE record_type = ?
                 """
                 cursor.execute(update_query, (new_column_name, old_column_name))
+                refresh_fundamentals(cursor)
                 self.connection.commit()
                 print(f"Successfully renamed {count} records from '{old_column_name}' to '{new_column_name}'")
                 return count
@@ -234,7 +609,7 @@ class DatabaseCRUD:
     def insert_price(self, ticker, date, close):
         try:
             if ticker is not None:
-                with self._lock, self.connection.get_cursor() as cursor:
+                with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                     company_id = self.select_company(ticker)
                     if company_id and self.is_valid_date(date) and close is not None:
                         cursor.execute("""
@@ -244,12 +619,56 @@ class DatabaseCRUD:
                         self.connection.commit()
                         return cursor.lastrowid
         except sqlite3.IntegrityError:
+            self.connection.rollback()
             return None
 
+    def bulk_insert_prices(self, df, date=None):
+        """
+        Insert a wide price DataFrame (dates x tickers) with a single executemany in one transaction.
+        If date is given, every price is saved at that date. Returns the number of prices written.
+        """
+        try:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
+                cursor.execute("SELECT UPPER(ticker), id FROM company")
+                company_ids = dict(cursor.fetchall())
+
+                rows, skipped = prepare_price_rows(df, company_ids, date)
+                if rows:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO price(company_id, date, close)
+                        VALUES(?, ?, ?)
+                    """, rows)
+                    self.connection.commit()
+                print(f"Prices processed: {len(rows)}, skipped: {skipped}")
+            # a bulk load is exported to the columnar store right away; inside a transaction the prices
+            # are not committed yet and the store is synced later
+            if rows and self.price_store is not None and not self.connection.in_transaction():
+                self.sync_price_store()
+            return len(rows)
+        except sqlite3.Error as e:
+            print(f"Error inserting prices in bulk: {e}")
+            self.connection.rollback()
+            return 0
+
+    # Export the price changes to the columnar store (rebuild=True exports every price again, e.g. after the
+    # database file was replaced). A store that fails to sync stays behind the table and the reads fall back to the table.
+    def sync_price_store(self, rebuild=False):
+        if self.price_store is None:
+            return
+        try:
+            self.price_store.sync(self.connection, rebuild=rebuild)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error syncing the columnar price store: {e}")
+
     def get_price(self, ticker, date):
         try:
             if ticker is not None and self.is_valid_date(date):
-                with self.connection.get_cursor() as cursor:
+                if self._store_serves([ticker]):
+                    _, closes = self.price_store.get_prices(ticker, date, date)
+                    if closes.size == 0 or np.isnan(closes[0]):
+                        return None
+                    return float(closes[0])
+                with self._read_cursor() as cursor:
                     company_id = self.select_company(ticker)
                     if company_id:
                         cursor.execute("""
@@ -269,7 +688,9 @@ class DatabaseCRUD:
         try:
             if ticker is None or ticker == "None":
                 return None
-            with self.connection.get_cursor() as cursor:
+            if self._store_serves([ticker]):
+                return self.price_store.get_last_price(ticker)
+            with self._read_cursor() as cursor:
                 company_id = self.select_company(ticker)
                 if company_id is None or company_id == "None":
                     return None
@@ -287,10 +708,16 @@ class DatabaseCRUD:
             print(f"Error getting last price: {e}")
             return None
     
-    def get_prices(self, ticker, start_date, end_date):
+    # as_array=True returns (dates, closes) NumPy arrays instead of a list of (date, close) rows.
+    # While the columnar price store is in sync with the price table they are zero-copy views over its
+    # files: every date of the price table in the range, with NaN closes on the dates the ticker has no
+    # price. Read from the table, they hold only the dates with a price.
+    def get_prices(self, ticker, start_date, end_date, as_array=False):
+        if as_array:
+            return self._get_prices_as_array(ticker, start_date, end_date)
         try:
             if ticker is not None and self.is_valid_date(start_date) and self.is_valid_date(end_date):
-                with self.connection.get_cursor() as cursor:
+                with self._read_cursor() as cursor:
                     company_id = self.select_company(ticker)
                     if company_id:
                         cursor.execute("""
@@ -302,10 +729,203 @@ class DatabaseCRUD:
             print(f"Error getting prices: {e}")
             return None
 
+    def _get_prices_as_array(self, ticker, start_date, end_date):
+        if ticker is None or not self.is_valid_date(start_date) or not self.is_valid_date(end_date):
+            return None
+        if self._store_serves([ticker]):
+            return self.price_store.get_prices(ticker, start_date, end_date)
+
+        rows = self.get_prices(ticker, start_date, end_date)
+        if rows is None:
+            return None
+        dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        closes = np.array([row[1] for row in rows], dtype=np.float64)
+        order = np.argsort(dates, kind="stable")
+        return dates[order], closes[order]
+
+    # The store is used only if it has all the tickers and exported every change of the price table
+    # (update_price, delete_price and insert_price do not sync it)
+    def _store_serves(self, tickers):
+        if self.price_store is None or not self.price_store.has_tickers(tickers):
+            return False
+        try:
+            with self._read_cursor() as cursor:
+                return self.price_store.is_synced(cursor)
+        except sqlite3.Error as e:
+            print(f"Error checking the columnar price store: {e}")
+            return False
+
+    def get_price_matrix(self, tickers, start_date, end_date, freq='D', how='last'):
+        """
+        Close prices of many tickers as a DataFrame with one row per date and one column per ticker
+        (NaN where a ticker has no price), read with a single query or from the columnar price store.
+
+        freq - 'D' daily, 'M' monthly (indexed by the first day of the month) or 'Y' yearly (indexed by the year)
+        how  - 'last' or 'mean' close of every month/year
+        tickers=None means every company in the database.
+        """
+        if not self.is_valid_date(start_date) or not self.is_valid_date(end_date):
+            return None
+        if tickers is None:
+            tickers = self.select_all_company_tickers()
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return pd.DataFrame()
+
+        if self._store_serves(tickers):
+            dates, values = self._price_matrix_from_store(tickers, start_date, end_date)
+        else:
+            dates, values = self._price_matrix_from_table(tickers, start_date, end_date)
+
+        matrix = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'), columns=tickers)
+        return resample_price_matrix(matrix, freq, how)
+
+    def _price_matrix_from_store(self, tickers, start_date, end_date):
+        dates = None
+        columns = []
+        for ticker in tickers:
+            dates, closes = self.price_store.get_prices(ticker, start_date, end_date)
+            columns.append(closes)
+        values = np.column_stack(columns) if dates.size else np.empty((0, len(tickers)))
+        # the calendar contains every date of the price table, keep only the dates where these tickers traded
+        traded = ~np.isnan(values).all(axis=1)
+        return dates[traded], values[traded]
+
+    def _price_matrix_from_table(self, tickers, start_date, end_date):
+        # the same company can be asked for with different cases
+        positions = {}
+        for position, ticker in enumerate(tickers):
+            positions.setdefault(ticker.upper(), []).append(position)
+        placeholders = ','.join('?' for _ in positions)
+        with self._read_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT UPPER(c.ticker), p.date, p.close
+                FROM price p
+                JOIN company c ON c.id = p.company_id
+                WHERE UPPER(c.ticker) IN ({placeholders}) AND p.date BETWEEN ? AND ?
+            """, list(positions) + [start_date, end_date])
+            rows = cursor.fetchall()
+
+        if not rows:
+            return np.array([], dtype='datetime64[D]'), np.empty((0, len(tickers)))
+        row_tickers, row_dates, row_closes = zip(*rows)
+        dates, date_positions = np.unique(np.array(row_dates, dtype='datetime64[D]'), return_inverse=True)
+        row_closes = np.array(row_closes, dtype=np.float64)
+        row_tickers = np.array(row_tickers, dtype=object)
+        values = np.full((dates.size, len(tickers)), np.nan)
+        for ticker, ticker_positions in positions.items():
+            rows_of_ticker = row_tickers == ticker
+            for position in ticker_positions:
+                values[date_positions[rows_of_ticker], position] = row_closes[rows_of_ticker]
+        return dates, values
+
+    def get_price_yearly_stats(self, ticker, start_year, end_year):
+        """
+        Yearly statistics of the close price (mean_close, min_close, max_close, last_close, n_days, last_date)
+        from the price_yearly_stats table, indexed by year. None if the company does not exist.
+        """
+        company_id = self.select_company(ticker)
+        if company_id is None:
+            return None
+        with self._read_cursor() as cursor:
+            cursor.execute("""
+                SELECT year, mean_close, min_close, max_close, last_close, n_days, last_date
+                FROM price_yearly_stats
+                WHERE company_id = ? AND year BETWEEN ? AND ?
+                ORDER BY year
+            """, (company_id, start_year, end_year))
+            rows = cursor.fetchall()
+        columns = ['year', 'mean_close', 'min_close', 'max_close', 'last_close', 'n_days', 'last_date']
+        return pd.DataFrame(rows, columns=columns).set_index('year')
+
+    def get_average_year_prices(self, ticker, start_year, end_year):
+        """
+        Average close price of every year, as a DataFrame with a 'Close' column indexed by year
+        (the format used by CombinedPriceEngine). None if the company does not exist.
+        """
+        try:
+            stats = self.get_price_yearly_stats(ticker, start_year, end_year)
+            if stats is None:
+                return None
+            annual_average = stats[['mean_close']].rename(columns={'mean_close': 'Close'})
+        except sqlite3.OperationalError:
+            # database without the price_yearly_stats migration: average the daily prices
+            history = self.get_prices(ticker, f'{start_year}-01-01', f'{end_year}-12-31')
+            if history is None:
+                return None
+            annual_average = pd.DataFrame(history, columns=['Date', 'Close'])
+            annual_average['Date'] = pd.to_datetime(annual_average['Date']).dt.year
+            annual_average = annual_average.groupby('Date').mean()
+        annual_average.index.name = 'Date'
+        return annual_average
+
+    def get_average_year_prices_for_tickers(self, tickers, start_year, end_year):
+        """
+        Average close price of every year for many tickers using a single query, as a DataFrame
+        with one row per year (start_year..end_year) and one column per ticker, NaN where missing.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        years = pd.Index(range(start_year, end_year + 1), name='Date')
+        if not tickers:
+            return pd.DataFrame(index=years)
+        # the same company can be asked for with different cases
+        positions = {}
+        for position, ticker in enumerate(tickers):
+            positions.setdefault(ticker.upper(), []).append(position)
+        placeholders = ','.join('?' for _ in positions)
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT UPPER(c.ticker), s.year, s.mean_close
+                    FROM price_yearly_stats s
+                    JOIN company c ON c.id = s.company_id
+                    WHERE UPPER(c.ticker) IN ({placeholders}) AND s.year BETWEEN ? AND ?
+                """, list(positions) + [start_year, end_year])
+                rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            # database without the price_yearly_stats migration: average the daily prices
+            with self._read_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT UPPER(c.ticker), CAST(substr(p.date, 1, 4) AS INTEGER) AS year, AVG(p.close)
+                    FROM price p
+                    JOIN company c ON c.id = p.company_id
+                    WHERE UPPER(c.ticker) IN ({placeholders}) AND p.date BETWEEN ? AND ?
+                    GROUP BY p.company_id, year
+                """, list(positions) + [f'{start_year}-01-01', f'{end_year}-12-31'])
+                rows = cursor.fetchall()
+
+        values = np.full((len(years), len(tickers)), np.nan)
+        for ticker, year, mean_close in rows:
+            values[year - start_year, positions[ticker]] = mean_close
+        return pd.DataFrame(values, index=years, columns=tickers)
+
+    def get_last_prices(self, tickers):
+        """UPPER(ticker) -> last close price for many tickers using a single query; tickers without prices are left out"""
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        if self._store_serves(tickers):
+            last_prices = {ticker.upper(): self.price_store.get_last_price(ticker) for ticker in tickers}
+            return {ticker: price for ticker, price in last_prices.items() if price is not None}
+        placeholders = ','.join('?' for _ in tickers)
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT UPPER(c.ticker), p.close
+                    FROM company c
+                    JOIN price p ON p.company_id = c.id
+                        AND p.date = (SELECT MAX(date) FROM price WHERE company_id = c.id)
+                    WHERE UPPER(c.ticker) IN ({placeholders})
+                """, [ticker.upper() for ticker in tickers])
+                return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            print(f"Error getting last prices: {e}")
+            return {}
+
     def delete_price(self, ticker, date):
         try:
             if ticker is not None and self.is_valid_date(date):
-                with self._lock, self.connection.get_cursor() as cursor:
+                with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                     company_id = self.select_company(ticker)
                     if company_id:
                         cursor.execute("""
@@ -322,7 +942,7 @@ class DatabaseCRUD:
     def update_price(self, ticker, date, price):
         try:
             if ticker is not None and self.is_valid_date(date) and price is not None:
-                with self._lock, self.connection.get_cursor() as cursor:
+                with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                     company_id = self.select_company(ticker)
                     if company_id:
                         cursor.execute("""
@@ -338,7 +958,7 @@ class DatabaseCRUD:
 
     def change_value(self, table_name, column_name, old_value, new_value):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 # Evită SQL injection folosind parametrii pentru numele tabelului și coloanei
                 safe_tables = ['company', 'financialStatement', 'financialData', 'price']
                 
@@ -348,6 +968,7 @@ class DatabaseCRUD:
                     
                 query = f"UPDATE {table_name} SET {column_name} = ? WHERE {column_name} = ?"
                 cursor.execute(query, (new_value, old_value))
+                refresh_fundamentals(cursor)
                 self.connection.commit()
                 return True
         except sqlite3.Error as e:
@@ -357,7 +978,7 @@ class DatabaseCRUD:
 
     def delete_company(self, ticker):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 cursor.execute("""
                     DELETE FROM company WHERE ticker = ?
                 """, (ticker,))
@@ -370,10 +991,11 @@ class DatabaseCRUD:
 
     def delete_all_financial_statement(self):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 cursor.execute("""
                     DELETE FROM financialStatement
                 """)
+                refresh_fundamentals(cursor)
                 self.connection.commit()
                 return True
         except sqlite3.Error as e:
@@ -383,10 +1005,11 @@ class DatabaseCRUD:
 
     def delete_all_financial_data(self):
         try:
-            with self._lock, self.connection.get_cursor() as cursor:
+            with self.connection.write_scope(), self.connection.get_cursor() as cursor:
                 cursor.execute("""
                     DELETE FROM financialData
                 """)
+                refresh_fundamentals(cursor)
                 self.connection.commit()
                 return True
         except sqlite3.Error as e:
@@ -394,4 +1017,21 @@ class DatabaseCRUD:
             self.connection.rollback()
             return False
 
+class _SharedDatabaseCRUD:
+    """
+    The DatabaseCRUD of the modules that keep one at module level (financial_metrics, data_preprocessing).
+    It is created at the first query, so importing those modules (e.g. in a worker process) does not open
+    the database.
+    """
+    def __init__(self):
+        self._db_crud = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._db_crud is None:
+            with self._lock:
+                if self._db_crud is None:
+                    self._db_crud = DatabaseCRUD()
+        return getattr(self._db_crud, name)
 
+shared_db_crud = _SharedDatabaseCRUD()
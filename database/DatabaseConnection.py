@@ -1,8 +1,22 @@
 import sqlite3
-from threading import Lock
-from utils.Constants import DB_NAME, BASE_DIR
+import threading
+from threading import Lock, RLock
+from utils.Constants import DB_NAME, BASE_DIR, DB_PRAGMAS
 import os
+from pathlib import Path
 from contextlib import contextmanager
+from database.SchemaMigrations import migrate
+
+def get_database_path(db_name=None):
+    """Calea absolută către baza de date (implicit DB_NAME din directorul proiectului)."""
+    if db_name is None:
+        return os.path.join(BASE_DIR, DB_NAME)
+    return db_name
+
+def apply_pragmas(connection, pragmas=DB_PRAGMAS):
+    """Aplică setările PRAGMA din configurație pe o conexiune."""
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
 
 class DatabaseConnection:
     _instance = None
@@ -14,16 +28,19 @@ class DatabaseConnection:
                 cls._instance = super(DatabaseConnection, cls).__new__(cls)
                 
                 # Use the absolute path to the database
-                if db_name is None:
-                    db_path = os.path.join(BASE_DIR, DB_NAME)
-                else:
-                    db_path = db_name
+                db_path = get_database_path(db_name)
                 
                 print(f"Connecting to database at: {db_path}")
                 
                 cls._instance.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
                 cls._instance.connection.execute("PRAGMA journal_mode=WAL")
                 cls._instance.connection.execute("PRAGMA busy_timeout = 30000")
+                apply_pragmas(cls._instance.connection)
+                # scrierile (și tranzacțiile) tuturor thread-urilor trec pe rând prin write_lock
+                cls._instance.write_lock = RLock()
+                cls._instance._savepoints = []
+                cls._instance._transaction_owner = None
+                migrate(cls._instance.connection)
         return cls._instance
     
     @contextmanager
@@ -36,9 +53,97 @@ class DatabaseConnection:
             cursor.close()
             
     def commit(self):
-        """Commit tranzacțiile la baza de date."""
-        with self._lock:
+        """Commit tranzacțiile la baza de date. În interiorul transaction() commit-ul se face la final."""
+        with self.write_lock:
+            if self.in_transaction():
+                return
             self.connection.commit()
+
+    def rollback(self):
+        """
+        Anulează tranzacția curentă. În interiorul transaction() nu face nimic: scrierea eșuată a fost
+        deja anulată de write_scope(), iar scrierile reușite ale blocului rămân.
+        """
+        with self.write_lock:
+            if self.in_transaction():
+                return
+            self.connection.rollback()
+
+    @contextmanager
+    def write_scope(self):
+        """
+        Cadrul unei scrieri făcute de DatabaseCRUD: ține write_lock pe durata scrierii.
+
+        În interiorul transaction() scrierea are propriul SAVEPOINT, o excepție anulează doar
+        instrucțiunile ei. În afara unei tranzacții o excepție anulează tranzacția implicită
+        deschisă de modulul sqlite3, astfel încât conexiunea nu rămâne cu o tranzacție deschisă.
+        """
+        with self.write_lock:
+            if not self.in_transaction():
+                try:
+                    yield self
+                except BaseException:
+                    self.connection.rollback()
+                    raise
+                return
+
+            savepoint = f"sp_{len(self._savepoints)}"
+            self.connection.execute(f"SAVEPOINT {savepoint}")
+            self._savepoints.append(savepoint)
+            try:
+                yield self
+            except BaseException:
+                self._savepoints.pop()
+                self.connection.execute(f"ROLLBACK TO {savepoint}")
+                self.connection.execute(f"RELEASE {savepoint}")
+                raise
+            self._savepoints.pop()
+            self.connection.execute(f"RELEASE {savepoint}")
+
+    def in_transaction(self):
+        """True dacă thread-ul curent este într-un bloc transaction()."""
+        return self._transaction_owner == threading.get_ident()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Grupează mai multe scrieri într-o singură tranzacție (BEGIN IMMEDIATE ... COMMIT).
+
+        Blocurile imbricate devin SAVEPOINT-uri: o excepție anulează doar scrierile blocului
+        în care a apărut. Commit-urile făcute de DatabaseCRUD în interior sunt amânate până la
+        ieșirea din blocul exterior. Celelalte thread-uri așteaptă write_lock pentru a scrie.
+        """
+        with self.write_lock:
+            outermost = not self._savepoints
+            if outermost:
+                # scrieri făcute fără commit (tranzacția implicită a modulului sqlite3) ar face BEGIN să eșueze;
+                # commit-ul următor le-ar fi salvat oricum
+                if self.connection.in_transaction:
+                    self.connection.commit()
+                self.connection.execute("BEGIN IMMEDIATE")
+                self._transaction_owner = threading.get_ident()
+            savepoint = f"sp_{len(self._savepoints)}"
+            self.connection.execute(f"SAVEPOINT {savepoint}")
+            self._savepoints.append(savepoint)
+            try:
+                yield self
+            except BaseException:
+                self._end_transaction_scope(savepoint, outermost, failed=True)
+                raise
+            self._end_transaction_scope(savepoint, outermost, failed=False)
+
+    def _end_transaction_scope(self, savepoint, outermost, failed):
+        self._savepoints.pop()
+        if outermost:
+            self._transaction_owner = None
+            if failed:
+                self.connection.rollback()
+            else:
+                self.connection.commit()
+            return
+        if failed:
+            self.connection.execute(f"ROLLBACK TO {savepoint}")
+        self.connection.execute(f"RELEASE {savepoint}")
             
     def close_connection(self):
         """Închide conexiunea la baza de date."""
@@ -48,5 +153,66 @@ class DatabaseConnection:
                 self.connection = None
             DatabaseConnection._instance = None
 
-# Reinitialize the global instance with the correct path
-db_connection = DatabaseConnection()
\ No newline at end of file
+class ReadOnlyConnection:
+    """
+    Conexiune SQLite read-only deținută de un singur worker (thread sau proces).
+
+    Expune aceeași interfață ca DatabaseConnection (get_cursor, commit, close_connection)
+    pentru a putea fi transmisă direct către DatabaseCRUD.
+    """
+    def __init__(self, db_name=None):
+        db_uri = Path(get_database_path(db_name)).resolve().as_uri() + "?mode=ro"
+        self.connection = sqlite3.connect(db_uri, uri=True, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA query_only = ON")
+        self.connection.execute("PRAGMA busy_timeout = 30000")
+        apply_pragmas(self.connection)
+        self.write_lock = RLock()
+
+    @contextmanager
+    def get_cursor(self):
+        """Returnează un cursor într-un context manager pentru a asigura închiderea corectă."""
+        cursor = self.connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def commit(self):
+        """Conexiunea este read-only, nu există nimic de salvat."""
+        pass
+
+    def rollback(self):
+        """Conexiunea este read-only, nu există nimic de anulat."""
+        pass
+
+    def in_transaction(self):
+        return False
+
+    @contextmanager
+    def write_scope(self):
+        """Conexiunea este read-only, scrierile vor eșua; păstrează doar serializarea prin write_lock."""
+        with self.write_lock:
+            yield self
+
+    @contextmanager
+    def transaction(self):
+        """Conexiunea este read-only, nu există scrieri de grupat."""
+        yield self
+
+    def close_connection(self):
+        """Închide conexiunea la baza de date."""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+# The global instance (from database.DatabaseConnection import db_connection) is opened on first use:
+# a process that only imports the module, like a screening worker, opens neither the writer nor migrates
+def __getattr__(name):
+    if name == "db_connection":
+        return DatabaseConnection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Close the global connection if this process opened it (for atexit)
+def close_db_connection():
+    if DatabaseConnection._instance is not None:
+        DatabaseConnection._instance.close_connection()
\ No newline at end of file
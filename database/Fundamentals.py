@@ -0,0 +1,129 @@
+# Wide, typed copy of financialData: one row per financial statement (company, statement_type, year)
+# with a REAL column per known record type, NULL when the record is missing or not a number ('None').
+# The triggers created by the schema migration mark the statements whose records changed in
+# fundamentals_dirty; refresh_fundamentals rebuilds only those rows.
+
+# The columns created by schema migration 5: the record types written by the statement parser at that
+# time, plus the misspelled operating cash flow of the older imports. The list is part of the migration
+# and must not change; a new record type gets its column in a new numbered migration (ALTER TABLE ADD
+# COLUMN) and is appended to FUNDAMENTAL_RECORD_TYPES.
+FUNDAMENTALS_COLUMNS_V5 = [
+    # income_statement
+    'grossProfit', 'revenue', 'COGS', 'operatingIncome', 'SG&A', 'researchAndDevelopment',
+    'depreciationAndAmortization', 'incomeBeforeTax', 'netIncomeFromContinuingOps', 'ebit', 'netIncome',
+    'interestExpense',
+    # balance_sheet
+    'totalAssets', 'totalCurrentAssets', 'cashAndCashEquivalentsAtCarryingValue', 'cashAndShortTermInvestments',
+    'inventory', 'currentNetReceivables', 'propertyPlantEquipment', 'intagibleAssets', 'goodwill',
+    'longTermInvestments', 'shortTermInvestments', 'otherCurrentAssets', 'otherNonCurrentAssets',
+    'totalLiabilities', 'totalCurrentLiabilities', 'currentAccountsPayable', 'deferredRevenue', 'currentDebt',
+    'shortTermDebt', 'capitalLeaseObligations', 'longTermDebt', 'otherCurrentLiabilities',
+    'otherNonCurrentLiabilities', 'totalEquity', 'treasuryStock', 'retainedEarnings', 'commonStock',
+    'sharesOutstanding',
+    # cash_flow_statement
+    'operatingCashFlow', 'capitalExpenditures', 'cashFlowInvesting', 'cashFlowFinancing', 'dividendPayout',
+    'dividendPayoutPreferredStock', 'changeInOperatingAssets', 'changeInOperatingLiabilities',
+    'operatingCashFow',
+]
+
+# Every column of the fundamentals table, in the order of the migrations
+FUNDAMENTAL_RECORD_TYPES = list(FUNDAMENTALS_COLUMNS_V5)
+
+def quote_column(record_type):
+    return '"' + record_type.replace('"', '""') + '"'
+
+# The trigger runs inside the outer INSERT/UPDATE, whose conflict policy would override an OR IGNORE here
+def _mark_dirty(statement_id):
+    return f"""INSERT INTO fundamentals_dirty SELECT {statement_id}
+        WHERE NOT EXISTS (SELECT 1 FROM fundamentals_dirty WHERE financial_statement_id = {statement_id});"""
+
+def _value_column(record_type):
+    return f"""MAX(CASE WHEN fd.record_type = '{record_type}' AND typeof(fd.record_value) IN ('integer', 'real')
+               THEN fd.record_value END)"""
+
+FUNDAMENTALS_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS fundamentals(
+        financial_statement_id INTEGER PRIMARY KEY,
+        company_id INTEGER NOT NULL,
+        statement_type TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        {', '.join(f'{quote_column(record_type)} REAL' for record_type in FUNDAMENTALS_COLUMNS_V5)},
+        UNIQUE(company_id, statement_type, year),
+        FOREIGN KEY(financial_statement_id) REFERENCES financialStatement(id)
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS fundamentals_dirty(financial_statement_id INTEGER PRIMARY KEY)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_data_insert AFTER INSERT ON financialData
+    BEGIN
+        {_mark_dirty('NEW.financial_statement_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_data_update AFTER UPDATE ON financialData
+    BEGIN
+        {_mark_dirty('OLD.financial_statement_id')}
+        {_mark_dirty('NEW.financial_statement_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_data_delete AFTER DELETE ON financialData
+    BEGIN
+        {_mark_dirty('OLD.financial_statement_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_statement_insert AFTER INSERT ON financialStatement
+    BEGIN
+        {_mark_dirty('NEW.id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_statement_update AFTER UPDATE ON financialStatement
+    BEGIN
+        {_mark_dirty('OLD.id')}
+        {_mark_dirty('NEW.id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fundamentals_statement_delete AFTER DELETE ON financialStatement
+    BEGIN
+        {_mark_dirty('OLD.id')}
+    END
+    """,
+]
+
+_REFRESH_DELETE = """
+    DELETE FROM fundamentals WHERE financial_statement_id IN (SELECT financial_statement_id FROM fundamentals_dirty)
+"""
+
+_REFRESH_INSERT = f"""
+    INSERT INTO fundamentals(financial_statement_id, company_id, statement_type, year,
+                             {', '.join(quote_column(record_type) for record_type in FUNDAMENTAL_RECORD_TYPES)})
+    SELECT fs.id, fs.company_id, fs.statement_type, fs.year,
+           {', '.join(_value_column(record_type) for record_type in FUNDAMENTAL_RECORD_TYPES)}
+    FROM fundamentals_dirty d
+    JOIN financialStatement fs ON fs.id = d.financial_statement_id
+    LEFT JOIN financialData fd ON fd.financial_statement_id = fs.id
+    GROUP BY fs.id
+"""
+
+# Rebuild the rows of the statements marked in fundamentals_dirty; returns the number of statements refreshed.
+# Runs in the caller's transaction, the caller commits.
+def refresh_fundamentals(cursor):
+    dirty = cursor.execute("SELECT COUNT(*) FROM fundamentals_dirty").fetchone()[0]
+    if dirty == 0:
+        return 0
+    cursor.execute(_REFRESH_DELETE)
+    cursor.execute(_REFRESH_INSERT)
+    cursor.execute("DELETE FROM fundamentals_dirty")
+    return dirty
+
+# Schema migration: create the tables and the triggers, then build the table from every statement
+def create_fundamentals(connection):
+    cursor = connection.cursor()
+    for statement in FUNDAMENTALS_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute("INSERT OR IGNORE INTO fundamentals_dirty SELECT id FROM financialStatement")
+    refresh_fundamentals(cursor)
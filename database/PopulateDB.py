@@ -1,127 +1,79 @@
 from database.DatabaseCRUD import DatabaseCRUD
 from stock.Stock import Stock
-import datetime as dt
-from database.models.Price import Price
+from utils.AlphaVantageFetcher import AlphaVantageFetcher
+from database.RefreshPlanner import RefreshPlanner
+
+# Number of companies written to the database in one transaction
+STATEMENT_BATCH_SIZE = 25
+
+STATEMENT_TYPES = ['income_statement', 'balance_sheet', 'cash_flow_statement']
 
 class PopulateDB:
-    def __init__(self):
+    def __init__(self, fetcher=None):
         self.db_crud = DatabaseCRUD()
+        self.fetcher = fetcher if fetcher is not None else AlphaVantageFetcher()
 
     def populate_history_prices(self, dataframe):
-        price_table = Price(self.db_crud.connection, self.db_crud.cursor)
-        rows_inserted = price_table.bulk_insert_historical_prices_from_dataframe(dataframe)
+        rows_inserted = self.db_crud.bulk_insert_prices(dataframe)
         print(f"It was inserted {rows_inserted} rows in the price table")
 
-    def populate_income_statement(self, list_companies):
-        if list_companies is None:
-            return
-        for company in list_companies:
-            try:
-                company = Stock(company)
-                statement_type = 'income_statement'
-                ticker = company.ticker
-                current_year = dt.datetime.now().year
-                company_id = self.db_crud.select_company(ticker)
-
-                if company_id is None:
-                    print(f"Company {ticker} not found in the database")
-                    continue
-
-                financial_statement_id = self.db_crud.select_financial_statement(company_id, statement_type, current_year - 1)
-                if financial_statement_id is not None:
-                    print(f"Skipping {statement_type} for {ticker}, already exists.")
-                    continue
-
-                df_company_income_statement = company.get_income_statement()
-                if df_company_income_statement is None:
-                    print(f"Income statement not retrieved for {ticker} from the API")
-                    continue
-
-                for fiscalDate, row in df_company_income_statement.iterrows():
-                    financial_statement_id = self.db_crud.select_financial_statement(company_id, statement_type, fiscalDate)
-                    if financial_statement_id is not None:
-                        print(f"The {statement_type} for {ticker} from year {fiscalDate} already exists")
-                        continue
-                    else:
-                        print(f"Inserting {statement_type} for {ticker} from year {fiscalDate}...")
-                        self.db_crud.insert_financial_statement(ticker, statement_type, fiscalDate)
-                        financial_statement_id = self.db_crud.select_financial_statement(company_id, statement_type, fiscalDate)
-
-                    for column, value in row.items():
-                        financial_data = self.db_crud.select_financial_data(financial_statement_id, column)
-                        if financial_data is not None:
-                            print(f"The {column} for {ticker} from year {fiscalDate} already exists.")
-                        else:
-                            print(f"Inserting {column} for {ticker} from year {fiscalDate}...")
-                            self.db_crud.insert_financial_data(ticker, statement_type, fiscalDate, column, value)
-
-                print(f"Inserted {statement_type} for {ticker}")
-            except Exception as e:
-                print(f"Error processing income statement for {ticker}: {e}")
+    def populate_income_statement(self, list_companies, batch_size=STATEMENT_BATCH_SIZE):
+        self.populate_statement(list_companies, 'income_statement', batch_size)
     
-    def populate_balance_sheet(self, list_companies):
-        if list_companies is None:
-            return
-        for company in list_companies:
-            company = Stock(company)
-            statement_type = 'balance_sheet'
-            ticker = company.ticker
-            current_year = dt.datetime.now().year
-            company_id = self.db_crud.select_company(ticker)
+    def populate_balance_sheet(self, list_companies, batch_size=STATEMENT_BATCH_SIZE):
+        self.populate_statement(list_companies, 'balance_sheet', batch_size)
 
-            if company_id is None:
-                print(f"Company ID not found for {ticker}")
-                continue
-            
-            financial_statement_id = self.db_crud.select_financial_statement(company_id, statement_type, current_year - 3)
-            if financial_statement_id is not None:
-                print(f"Skipping {statement_type} for {ticker}, already exists.")
-                continue
-            
-            df_balace_sheet = company.get_balance_sheet()
-            if df_balace_sheet is None:
-                print(f"Balance sheet not retrieved for {ticker}")
-                continue
-
-            for fiscalDate, row in df_balace_sheet.iterrows():
-                self.db_crud.insert_financial_statement(ticker, statement_type, fiscalDate)
-                print(f"Inserted {statement_type} for {ticker} from {fiscalDate}")
-                for column in df_balace_sheet.columns:
-                    self.db_crud.insert_financial_data(ticker, statement_type, fiscalDate, column, row[column])
-                    print(f"Inserted {column} for {fiscalDate}")
-            print(f"Inserted {statement_type} for {ticker}")
+    def populate_cash_flow_statement(self, list_companies, batch_size=STATEMENT_BATCH_SIZE):
+        self.populate_statement(list_companies, 'cash_flow_statement', batch_size)
 
-    def populate_cash_flow_statement(self, list_companies):
+    # Fetch the statement of the companies that are not up to date concurrently from the API and write
+    # their new fiscal years to the database in batches of batch_size tickers, each batch in a single
+    # transaction. A company is up to date if it has the last completed fiscal year (current_year - 1).
+    # The plan is printed before fetching; dry_run=True only prints it.
+    def populate_statement(self, list_companies, statement_type, batch_size=STATEMENT_BATCH_SIZE, dry_run=False):
         if list_companies is None:
             return
-        for company in list_companies:
-            company = Stock(company)
-            statement_type = 'cash_flow_statement'
-            ticker = company.ticker
-            current_year = dt.datetime.now().year
-            company_id = self.db_crud.select_company(ticker)
-
-            if company_id is None:
-                print(f"Company ID not found for {ticker}")
-                continue
-            
-            financial_statement_id = self.db_crud.select_financial_statement(company_id, statement_type, current_year - 3)
-            if financial_statement_id is not None:
-                print(f"Skipping {statement_type} for {ticker}, already exists.")
+        plan = RefreshPlanner(self.db_crud).plan(list_companies, [statement_type])[statement_type]
+        print(plan.report())
+        if dry_run or not plan.to_fetch:
+            return plan
+
+        print(f"Fetching {statement_type} for {len(plan.to_fetch)} companies...")
+        statements = self.fetcher.fetch_statements(plan.to_fetch, statement_type)
+
+        batch = {}
+        for ticker in plan.to_fetch:
+            df_statement = statements.get(ticker)
+            if df_statement is None:
+                print(f"The {statement_type} was not retrieved for {ticker} from the API")
                 continue
 
-            df_cash_flow = company.get_cashflow_data()
-            if df_cash_flow is None:
-                print(f"Cash flow statement not retrieved for {ticker}")
+            df_statement = plan.new_years(ticker, df_statement)
+            if df_statement.empty:
+                print(f"No new {statement_type} for {ticker} since {plan.latest_years[ticker]}")
                 continue
+            print(f"New {statement_type} for {ticker}: {', '.join(str(year) for year in df_statement.index)}")
+
+            batch[ticker] = df_statement
+            if len(batch) >= batch_size:
+                self._write_statement_batch(statement_type, batch)
+                batch = {}
+
+        self._write_statement_batch(statement_type, batch)
+        return plan
 
-            for fiscalDate, row in df_cash_flow.iterrows():
-                self.db_crud.insert_financial_statement(ticker, statement_type, fiscalDate)
-                print(f"Inserted {statement_type} for {ticker} from {fiscalDate}")
-                for column in df_cash_flow.columns:
-                    self.db_crud.insert_financial_data(ticker, statement_type, fiscalDate, column, row[column])
-                    print(f"Inserted {column} for {fiscalDate}")
-            print(f"Inserted {statement_type} for {ticker}")
+    # Print what the populate_* methods would fetch for every statement type, without calling the API
+    def plan_refresh(self, list_companies):
+        plans = RefreshPlanner(self.db_crud).plan(list_companies, STATEMENT_TYPES)
+        for plan in plans.values():
+            print(plan.report())
+        return plans
+
+    def _write_statement_batch(self, statement_type, batch):
+        if not batch:
+            return
+        rows_inserted = self.db_crud.bulk_insert_financial_statements(statement_type, batch)
+        print(f"Inserted {statement_type} for {', '.join(batch)} ({rows_inserted} records)")
 
     def populate_company_table(self, list_companies):
         if list_companies is None:
@@ -0,0 +1,66 @@
+import datetime as dt
+
+class RefreshPlan:
+    """
+    What an incremental refresh of one statement type will do for a list of companies.
+
+    A company is up to date when its latest stored fiscal year is at least min_year; the others
+    are fetched from the API and only their fiscal years newer than the stored ones are written.
+    """
+    def __init__(self, statement_type, min_year):
+        self.statement_type = statement_type
+        self.min_year = min_year
+        # ticker -> latest fiscal year stored, None when the company has no statement of this type yet
+        self.latest_years = {}
+        self.up_to_date = []
+        self.to_fetch = []
+        self.missing_companies = []
+
+    def add(self, ticker, latest_year):
+        self.latest_years[ticker] = latest_year
+        if latest_year is not None and latest_year >= self.min_year:
+            self.up_to_date.append(ticker)
+        else:
+            self.to_fetch.append(ticker)
+
+    # Keep only the fiscal years of a fetched statement that are newer than the stored ones
+    def new_years(self, ticker, df_statement):
+        latest_year = self.latest_years.get(ticker)
+        if df_statement is None or latest_year is None:
+            return df_statement
+        return df_statement[[int(year) > latest_year for year in df_statement.index]]
+
+    def report(self):
+        lines = [f"Refresh plan for {self.statement_type} (up to date from fiscal year {self.min_year}):",
+                 f"  {len(self.up_to_date)} up to date, {len(self.to_fetch)} to fetch, "
+                 f"{len(self.missing_companies)} not in the database"]
+        for ticker in self.to_fetch:
+            latest_year = self.latest_years[ticker]
+            since = "no statement stored" if latest_year is None else f"latest stored {latest_year}"
+            lines.append(f"  fetch {ticker} ({since})")
+        for ticker in self.missing_companies:
+            lines.append(f"  skip {ticker} (company not found)")
+        return "\n".join(lines)
+
+class RefreshPlanner:
+    """Builds the RefreshPlan of every statement type from the latest fiscal years, read with one query"""
+    def __init__(self, db_crud):
+        self.db_crud = db_crud
+
+    # The statements of a company are up to date if they have the last completed fiscal year
+    # (latest_fiscal_year, current_year - 1 by default)
+    def plan(self, list_companies, statement_types, latest_fiscal_year=None):
+        if latest_fiscal_year is None:
+            latest_fiscal_year = dt.datetime.now().year - 1
+        latest_years = self.db_crud.select_latest_statement_years(list_companies)
+        plans = {}
+        for statement_type in statement_types:
+            plan = RefreshPlan(statement_type, latest_fiscal_year)
+            for ticker in list_companies:
+                company_years = latest_years.get(ticker.upper())
+                if company_years is None:
+                    plan.missing_companies.append(ticker)
+                else:
+                    plan.add(ticker, company_years.get(statement_type))
+            plans[statement_type] = plan
+        return plans
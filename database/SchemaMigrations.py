@@ -0,0 +1,194 @@
+from database.models.Company import Company
+from database.models.FinancialStatement import FinancialStatement
+from database.models.FinancialData import FinancialData
+from database.models.Price import Price
+from database.Fundamentals import create_fundamentals
+
+# The schema version of a database is kept in PRAGMA user_version.
+# Every migration has a version, a description and either a list of SQL statements
+# or a function(connection) and is applied only once, in order.
+
+def _create_base_tables(connection):
+    cursor = connection.cursor()
+    Company(connection, cursor).create_table()
+    FinancialStatement(connection).create_table()
+    FinancialData(connection, cursor).create_table()
+    Price(connection, cursor).create_table()
+
+# Recompute the yearly statistics of the prices matching the WHERE clause
+_PRICE_YEARLY_STATS_REBUILD = """
+    INSERT OR REPLACE INTO price_yearly_stats(company_id, year, mean_close, min_close, max_close,
+                                              last_close, n_days, sum_close, last_date)
+    SELECT s.company_id, s.year, s.sum_close / s.n_days, s.min_close, s.max_close,
+           p.close, s.n_days, s.sum_close, s.last_date
+    FROM (
+        SELECT company_id, CAST(substr(date, 1, 4) AS INTEGER) AS year, SUM(close) AS sum_close,
+               COUNT(*) AS n_days, MIN(close) AS min_close, MAX(close) AS max_close, MAX(date) AS last_date
+        FROM price
+        WHERE {where}
+        GROUP BY company_id, year
+    ) s
+    JOIN price p ON p.company_id = s.company_id AND p.date = s.last_date;
+"""
+
+# Statistics of the (company, year) of a price row that changed or was deleted
+def _price_yearly_stats_refresh_group(row):
+    return f"""
+        DELETE FROM price_yearly_stats
+        WHERE company_id = {row}.company_id AND year = CAST(substr({row}.date, 1, 4) AS INTEGER);
+    """ + _PRICE_YEARLY_STATS_REBUILD.format(
+        where=f"company_id = {row}.company_id "
+              f"AND date BETWEEN substr({row}.date, 1, 4) || '-01-01' AND substr({row}.date, 1, 4) || '-12-31'"
+    )
+
+MIGRATIONS = [
+    (1, "create the base tables", _create_base_tables),
+    (2, "indexes for the point lookups", [
+        # select_company searches with UPPER(ticker) = UPPER(?), which the UNIQUE(ticker) index cannot serve
+        "CREATE INDEX IF NOT EXISTS idx_company_ticker_upper ON company(UPPER(ticker))",
+        # (company_id, statement_type, year) is already served by the UNIQUE constraint of financialStatement;
+        # these two cover the value/close column so the lookups never touch the table itself
+        "CREATE INDEX IF NOT EXISTS idx_financial_data_lookup ON financialData(financial_statement_id, record_type, record_value)",
+        "CREATE INDEX IF NOT EXISTS idx_price_lookup ON price(company_id, date, close)",
+    ]),
+    (3, "log of the updated and deleted prices for the columnar price store", [
+        # new prices are found by price.id > the last one exported; the rows changed in place are logged
+        # here so ColumnarPriceStore.sync can re-export them
+        """
+        CREATE TABLE IF NOT EXISTS price_changes(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            deleted_price_id INTEGER
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_price_changes_deleted ON price_changes(deleted_price_id)",
+        # SQLite gives a new row MAX(id) + 1, so a price.id can be given again after the last rows were
+        # deleted; only such an id is <= a deleted one and the insert is logged as a change
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_price_changes_reused_id AFTER INSERT ON price
+        WHEN NEW.id <= (SELECT MAX(deleted_price_id) FROM price_changes)
+        BEGIN
+            INSERT INTO price_changes(company_id, date) VALUES(NEW.company_id, NEW.date);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_price_changes_update AFTER UPDATE OF company_id, date, close ON price
+        BEGIN
+            INSERT INTO price_changes(company_id, date) VALUES(OLD.company_id, OLD.date);
+            INSERT INTO price_changes(company_id, date) VALUES(NEW.company_id, NEW.date);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_price_changes_delete AFTER DELETE ON price
+        BEGIN
+            INSERT INTO price_changes(company_id, date, deleted_price_id) VALUES(OLD.company_id, OLD.date, OLD.id);
+        END
+        """,
+    ]),
+    (4, "yearly price statistics kept up to date by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS price_yearly_stats(
+            company_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            mean_close REAL NOT NULL,
+            min_close REAL NOT NULL,
+            max_close REAL NOT NULL,
+            last_close REAL NOT NULL,
+            n_days INTEGER NOT NULL,
+            sum_close REAL NOT NULL,
+            last_date TEXT NOT NULL,
+            PRIMARY KEY(company_id, year),
+            FOREIGN KEY(company_id) REFERENCES company(id)
+        ) WITHOUT ROWID
+        """,
+        _PRICE_YEARLY_STATS_REBUILD.format(where="1"),
+        # a new price only updates the running statistics of its year
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_price_yearly_stats_insert AFTER INSERT ON price
+        BEGIN
+            INSERT INTO price_yearly_stats(company_id, year, mean_close, min_close, max_close,
+                                           last_close, n_days, sum_close, last_date)
+            VALUES(NEW.company_id, CAST(substr(NEW.date, 1, 4) AS INTEGER), NEW.close, NEW.close, NEW.close,
+                   NEW.close, 1, NEW.close, NEW.date)
+            ON CONFLICT(company_id, year) DO UPDATE SET
+                mean_close = (sum_close + excluded.sum_close) / (n_days + 1),
+                min_close = MIN(min_close, excluded.min_close),
+                max_close = MAX(max_close, excluded.max_close),
+                last_close = CASE WHEN excluded.last_date >= last_date THEN excluded.last_close ELSE last_close END,
+                n_days = n_days + 1,
+                sum_close = sum_close + excluded.sum_close,
+                last_date = MAX(last_date, excluded.last_date);
+        END
+        """,
+        # an updated or deleted price recomputes its (company, year) group
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_price_yearly_stats_update AFTER UPDATE OF company_id, date, close ON price
+        BEGIN
+            {_price_yearly_stats_refresh_group("OLD")}
+            {_price_yearly_stats_refresh_group("NEW")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_price_yearly_stats_delete AFTER DELETE ON price
+        BEGIN
+            {_price_yearly_stats_refresh_group("OLD")}
+        END
+        """,
+    ]),
+    (5, "wide typed fundamentals table refreshed from financialData", create_fundamentals),
+    (6, "sentiment scores of the report sections keyed by document hash", [
+        # one row per section of a document scored with a model and a chunking (chunk_size/overlap in tokens);
+        # position keeps the order of the sections in the document
+        """
+        CREATE TABLE IF NOT EXISTS sentiment_section_scores(
+            content_hash TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            overlap INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            negative REAL NOT NULL,
+            neutral REAL NOT NULL,
+            positive REAL NOT NULL,
+            scored_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(content_hash, model_name, chunk_size, overlap, position)
+        ) WITHOUT ROWID
+        """,
+    ]),
+]
+
+def get_schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+# Apply the migrations newer than the database's version, then refresh the planner statistics.
+# Returns the list of versions that were applied.
+def migrate(connection):
+    current_version = get_schema_version(connection)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            if callable(step):
+                step(connection)
+            else:
+                for statement in step:
+                    connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            print(f"Error applying schema migration {version} ({description}): {e}")
+            break
+        print(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+
+    if applied:
+        analyze(connection)
+    return applied
+
+# Refresh the statistics used by the query planner to choose between the indexes
+def analyze(connection):
+    connection.execute("ANALYZE")
+    connection.commit()
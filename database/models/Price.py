@@ -3,6 +3,36 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 
+# Transformă un DataFrame wide (index = data sau coloana 'Date', o coloană per ticker) în rândurile
+# (company_id, date, close) pentru tabela price, fără a itera rând cu rând.
+# company_ids - dicționar UPPER(ticker) -> company_id
+# date        - dacă este dat, toate prețurile sunt salvate la această dată (ex: jobul zilnic)
+# Returnează (rânduri, număr de valori ignorate: ticker necunoscut, dată invalidă sau preț lipsă)
+def prepare_price_rows(df, company_ids, date=None):
+    if 'Date' in df.columns:
+        df = df.set_index('Date')
+
+    if date is not None:
+        dates = pd.Series(pd.to_datetime(date, format='%Y-%m-%d', errors='coerce'), index=range(len(df.index)))
+    elif pd.api.types.is_datetime64_any_dtype(df.index):
+        dates = pd.Series(df.index)
+    else:
+        dates = pd.Series(pd.to_datetime(df.index.astype(str), format='%Y-%m-%d', errors='coerce'))
+    valid_dates = dates.notna().to_numpy()
+    date_strings = dates.dt.strftime('%Y-%m-%d').to_numpy()
+
+    ids = np.array([company_ids.get(str(ticker).upper()) for ticker in df.columns], dtype=object)
+    known_tickers = np.array([company_id is not None for company_id in ids], dtype=bool)
+
+    closes = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid = ~np.isnan(closes) & valid_dates[:, None] & known_tickers[None, :]
+    date_positions, ticker_positions = np.nonzero(valid)
+
+    rows = list(zip(ids[ticker_positions].tolist(),
+                    date_strings[date_positions].tolist(),
+                    closes[date_positions, ticker_positions].tolist()))
+    return rows, closes.size - len(rows)
+
 class Price:
     def __init__(self, connection, cursor):
         self.connection = connection
@@ -30,45 +60,13 @@ class Price:
         
     def bulk_insert_historical_prices_from_dataframe(self, df):
         try:
-            # Resetăm indexul pentru a avea data ca o coloană
-            df_reset = df.reset_index()
-            
-            # Asigurăm-ne că coloana Date este string în formatul 'YYYY-MM-DD'
-            if pd.api.types.is_datetime64_any_dtype(df_reset['Date']):
-                df_reset['Date'] = df_reset['Date'].dt.strftime('%Y-%m-%d')
-            else:
-                # Dacă nu este datetime, ne asigurăm că este un string și are formatul corect
-                df_reset['Date'] = df_reset['Date'].astype(str)
-            
-            # Convertim în format long (melt)
-            df_melted = df_reset.melt(
-                id_vars='Date',
-                var_name='ticker',
-                value_name='close'
-            )
-            
             # Obținem dicționarul de mapare ticker -> company_id
-            company_ids = {}
             with self.connection:
-                self.cursor.execute("SELECT ticker, id FROM company")
-                for ticker, company_id in self.cursor.fetchall():
-                    company_ids[ticker] = company_id
-            
-            # Pregătim datele pentru inserare în bloc
-            bulk_data = []
-            skipped_rows = 0
-            
-            for _, row in df_melted.iterrows():
-                ticker = row['ticker']
-                date = row['Date']
-                close = row['close']
-                
-                # Verificăm dacă valorile sunt valide
-                if ticker in company_ids and self.is_valide_date(date) and close is not None and not pd.isna(close):
-                    bulk_data.append((company_ids[ticker], date, float(close)))
-                else:
-                    skipped_rows += 1
-            
+                self.cursor.execute("SELECT UPPER(ticker), id FROM company")
+                company_ids = dict(self.cursor.fetchall())
+
+            bulk_data, skipped_rows = prepare_price_rows(df, company_ids)
+
             # Executăm inserarea în bloc
             if bulk_data:
                 with self.connection:
@@ -1,13 +1,12 @@
-from database.DatabaseCRUD import DatabaseCRUD
+from database.DatabaseCRUD import shared_db_crud as db_crud
 import os
 import pandas as pd
 from utils.Constants import FILTERED_DIVIDEND_COMPANY_FILE_PATH
 from datetime import datetime, timedelta
 from utils.SafeDivide import safe_divide
+from utils.DividendMetadata import get_dividend_field
 from datetime import datetime
 
-db_crud = DatabaseCRUD()
-
 def get_last_trading_day(year):
     last_day = datetime(year, 12, 31)
 
@@ -89,9 +88,7 @@ def calculate_current_ratio(ticker, year):
             return None
         
 def get_dividend_record_from_excel(ticker):
-        if os.path.exists(FILTERED_DIVIDEND_COMPANY_FILE_PATH):
-            df = pd.read_csv(FILTERED_DIVIDEND_COMPANY_FILE_PATH)
-            return df.at[df.index[df['Symbol'] == ticker][0], 'No Years']
+        return get_dividend_field(ticker, 'No Years', FILTERED_DIVIDEND_COMPANY_FILE_PATH)
         
 def calculate_dividend_record(ticker, year):
      current_year = datetime.now().year
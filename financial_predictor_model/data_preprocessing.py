@@ -1,17 +1,20 @@
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from database.DatabaseCRUD import DatabaseCRUD
+from database.DatabaseCRUD import shared_db_crud as db_crud
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
-db_crud = DatabaseCRUD()
-
 def create_prices_dataframe_of_company(ticker, start_date, end_date):
-    prices = db_crud.get_prices(ticker, start_date, end_date)
-    df = pd.DataFrame(prices, columns=['Date', 'Close Price'])
-    df = df.set_index('Date')
+    # the closes are read from the columnar price store when it is in sync, NaN on the dates without a price
+    prices = db_crud.get_prices(ticker, start_date, end_date, as_array=True)
+    if prices is None:
+        return pd.DataFrame(columns=['Close Price'], index=pd.Index([], name='Date'))
+    dates, closes = prices
+    traded = ~np.isnan(closes)
+    df = pd.DataFrame({'Close Price': closes[traded]},
+                      index=pd.Index(np.datetime_as_string(dates[traded], unit='D'), name='Date'))
     return df
 
 def add_technical_indicators(df):
@@ -1,29 +1,30 @@
 import os
 import re
 import json
+import hashlib
 import pandas as pd
 import numpy as np
 import torch
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import nltk
-from nltk.tokenize import sent_tokenize
 import logging
 from tqdm import tqdm
 import sys
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import queue
 import threading
-import nltk
 import os
 import re
-import nltk
 import logging
 
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s', 
     handlers=[
-        logging.FileHandler("sentiment_analysis.log", encoding="utf-8", mode='w')
+        # procesele worker ale pipeline-ului reimportă modulul, ele adaugă la log-ul procesului principal
+        logging.FileHandler("sentiment_analysis.log", encoding="utf-8",
+                            mode='w' if multiprocessing.parent_process() is None else 'a')
     ]
 )
 
@@ -32,66 +33,176 @@ console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logging.getLogger().addHandler(console_handler)
 
-# --- BLOC DE CONFIGURARE ȘI DESCĂRCARE NLTK (VERSIUNE CORECTATĂ) ---
+# Adăugăm calea pentru a importa DatabaseCRUD (importat în SentimentAnalysisManager: procesele worker
+# ale pipeline-ului reimportă modulul și nu trebuie să deschidă conexiunea de scriere / să ruleze migrările)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def download_nltk_resource(resource_name, resource_path_to_find, downloader_arg):
-    """Funcție ajutătoare pentru a verifica și descărca o resursă NLTK."""
-    try:
-        logging.info(f"Verificare resursă NLTK '{resource_name}' la '{resource_path_to_find}'...")
-        nltk.data.find(resource_path_to_find)
-        logging.info(f"Resursa NLTK '{resource_name}' este deja disponibilă.")
-        return True
-    except LookupError:
-        logging.warning(f"Resursa NLTK '{resource_name}' nu a fost găsită. Se încearcă descărcarea '{downloader_arg}'...")
-        try:
-            nltk.download(downloader_arg, quiet=True) # quiet=True pentru a evita GUI dacă e posibil
-            logging.info(f"Descărcarea pentru '{downloader_arg}' a fost inițiată. Se reverifică...")
-            # Este important să reverificăm, deoarece nltk.download() nu ridică mereu erori clare la eșec
-            nltk.data.find(resource_path_to_find)
-            logging.info(f"Resursa NLTK '{resource_name}' este acum disponibilă după descărcare.")
-            return True
-        except Exception as e_download:
-            # Aceasta poate fi LookupError dacă descărcarea nu a reușit să facă resursa găsibilă,
-            # sau altă eroare (ex: de rețea, deși nltk.download le maschează adesea)
-            logging.error(f"Descărcarea sau reverificarea pentru '{downloader_arg}' a eșuat: {e_download}")
-            return False
-    except Exception as e_find_initial:
-        logging.error(f"Eroare neașteptată la căutarea inițială a resursei '{resource_name}': {e_find_initial}")
-        return False
-
-# Încercăm să descărcăm 'punkt_tab' mai întâi, deoarece eroarea îl cere specific
-logging.info("--- Început configurare resurse NLTK ---")
-punkt_tab_ok = download_nltk_resource(
-    resource_name="punkt_tab",
-    resource_path_to_find='tokenizers/punkt_tab',
-    downloader_arg='punkt_tab'
-)
+class _HTMLTextParser(HTMLParser):
+    """
+    Parser HTML incremental (feed pe blocuri) care păstrează textul documentului, fără script și style.
 
-if not punkt_tab_ok:
-    logging.warning("Nu s-a putut obține 'punkt_tab'. Se încearcă cu resursa 'punkt' standard.")
-    punkt_ok = download_nltk_resource(
-        resource_name="punkt",
-        resource_path_to_find='tokenizers/punkt',
-        downloader_arg='punkt'
-    )
-    if not punkt_ok:
-        logging.error("NICI 'punkt_tab', NICI 'punkt' nu au putut fi obținute. Tokenizarea propozițiilor probabil va eșua.")
-else:
-    # Dacă punkt_tab_ok este True, nu mai este necesar să încercăm și punkt separat,
-    # presupunând că 'punkt_tab' este ceea ce caută în mod specific.
-    pass
-
-logging.info("--- Sfârșit configurare resurse NLTK ---")
-
-# Adăugăm calea pentru a importa DatabaseCRUD
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from database.DatabaseCRUD import DatabaseCRUD
+    Textul dintre două tag-uri format doar din spații ASCII devine ' ' sau '\n' (în afara pre/textarea),
+    la fel ca la BeautifulSoup, astfel încât textul obținut este cel dat de soup.get_text().
+    """
+    SKIPPED_TAGS = ("script", "style")
+    PRESERVE_WHITESPACE_TAGS = ("pre", "textarea")
+    ASCII_SPACES = str.maketrans("", "", " \n\t\x0c\r")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._data = []
+        self._text = []
+        self._skipped = 0
+        self._preserved = 0
+
+    def _end_data(self):
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if self._skipped:
+            return
+        if not self._preserved and not data.translate(self.ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self._text.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_data()
+        if tag in self.SKIPPED_TAGS:
+            self._skipped += 1
+        elif tag in self.PRESERVE_WHITESPACE_TAGS:
+            self._preserved += 1
+
+    def handle_endtag(self, tag):
+        self._end_data()
+        if tag in self.SKIPPED_TAGS and self._skipped:
+            self._skipped -= 1
+        elif tag in self.PRESERVE_WHITESPACE_TAGS and self._preserved:
+            self._preserved -= 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_data()
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._end_data()
+
+    def handle_decl(self, decl):
+        self._end_data()
+
+    def handle_pi(self, data):
+        self._end_data()
+
+    def unknown_decl(self, data):
+        self._end_data()
+
+    def close(self):
+        super().close()
+        self._end_data()
+
+    def pop_text(self):
+        """Textul parsat de la apelul anterior"""
+        text = "".join(self._text)
+        self._text = []
+        return text
+
+# Textul este împărțit în fraze după sfârșiturile de linie (aceleași ca la str.splitlines) și după două spații
+_PHRASE_SEPARATORS = re.compile(r"[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]|  ")
+
+class _TextNormalizer:
+    """
+    Curățarea din extract_text_from_html aplicată textului primit pe bucăți: frazele fără spațiile
+    de la capete, unite printr-un spațiu. Fraza neterminată a unei bucăți continuă în bucata următoare.
+    """
+    def __init__(self):
+        self._phrase = []
+
+    def push(self, text):
+        """Frazele terminate în text (și în bucățile anterioare), unite prin spațiu"""
+        phrases = []
+        # două spații despărțite între bucăți
+        if self._phrase and self._phrase[-1].endswith(" ") and text.startswith(" "):
+            phrases.append("".join(self._phrase)[:-1])
+            self._phrase = []
+            text = text[1:]
+        pieces = _PHRASE_SEPARATORS.split(text)
+        if len(pieces) > 1:
+            phrases.append("".join(self._phrase) + pieces[0])
+            phrases.extend(pieces[1:-1])
+            self._phrase = []
+        if pieces[-1]:
+            self._phrase.append(pieces[-1])
+        return " ".join(phrase for phrase in (phrase.strip() for phrase in phrases) if phrase)
+
+    def finish(self):
+        """Ultima frază"""
+        phrase = "".join(self._phrase).strip()
+        self._phrase = []
+        return phrase
+
+class _SectionMatcher:
+    """
+    Caută un pattern de secțiune "START(.*?)(?=END)" într-un text primit pe bucăți:
+    prima potrivire a lui START, apoi prima potrivire a lui END după ea, ca re.search pe tot textul.
+    Pozițiile sunt absolute (în tot textul), bufferul comun este ținut de extract_sections_streaming.
+    """
+    def __init__(self, section_name, index, pattern):
+        start, end = pattern.split("(.*?)(?=", 1)
+        self.section_name = section_name
+        self.index = index
+        self.start_re = re.compile(start, re.DOTALL | re.IGNORECASE)
+        self.end_re = re.compile(end[:-1], re.DOTALL | re.IGNORECASE)
+        self.search_from = 0
+        self.body_start = None
+        self.text = None
+        self.active = True
+
+    # Poziția de la care textul mai este necesar
+    def needed_from(self):
+        return self.search_from if self.body_start is None else self.body_start
+
+    def advance(self, buffer, base, final, margin):
+        """Continuă căutarea în buffer (textul de la poziția base); True când secțiunea s-a terminat"""
+        while True:
+            pattern = self.start_re if self.body_start is None else self.end_re
+            match = pattern.search(buffer, max(self.search_from - base, 0))
+            # o potrivire mai aproape de final decât margin poate fi precedată de una care
+            # nu este încă completă, se așteaptă textul următor
+            if match is None or (not final and match.start() > len(buffer) - margin):
+                if match is not None:
+                    self.search_from = base + match.start()
+                else:
+                    self.search_from = max(self.search_from, base + len(buffer) - margin, self.needed_from())
+                if final:
+                    self.active = False
+                return False
+            if self.body_start is None:
+                self.body_start = self.search_from = base + match.end()
+                continue
+            self.text = buffer[self.body_start - base:match.start()].strip()
+            self.active = False
+            return True
 
 class HTML10KProcessor:
     """
     Clasă pentru procesarea rapoartelor 10-K în format HTML
     """
-    def __init__(self):
+    # Lungimea maximă a unei potriviri a pattern-urilor de secțiune, păstrată între blocurile de text
+    MATCH_MARGIN = 4096
+    # Textul este căutat în bucăți de cel puțin atâtea caractere, astfel încât bufferul unei secțiuni
+    # încă deschise este copiat de puține ori
+    SEARCH_BATCH = 1 << 16
+
+    def __init__(self, streaming=True, block_size=1 << 16):
+        """
+        streaming: textul este extras pe blocuri de block_size caractere cu un parser incremental și
+                   secțiunile sunt căutate pe măsură ce textul este citit (extract_sections_streaming);
+                   False folosește BeautifulSoup pe tot documentul (extract_text_from_html + extract_sections)
+        """
+        self.streaming = streaming
+        self.block_size = block_size
         # Secțiunile importante din rapoartele 10-K
         self.sections_patterns = {
             "MD&A": [
@@ -144,6 +255,119 @@ class HTML10KProcessor:
             return ""
         
 
+    def iter_text_blocks(self, file_path):
+        """Generator: citește fișierul HTML pe blocuri și emite textul curățat pe măsură ce este parsat"""
+        parser = _HTMLTextParser()
+        normalizer = _TextNormalizer()
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            for html in iter(lambda: file.read(self.block_size), ''):
+                parser.feed(html)
+                text = normalizer.push(parser.pop_text())
+                if text:
+                    yield text
+        parser.close()
+        for text in (normalizer.push(parser.pop_text()), normalizer.finish()):
+            if text:
+                yield text
+
+    def extract_sections_streaming(self, text_blocks):
+        """
+        Extrage secțiunile importante dintr-un flux de blocuri de text (iter_text_blocks), cu aceleași
+        rezultate ca extract_sections pe textul complet.
+
+        Se păstrează în memorie doar textul de la cea mai veche poziție încă necesară unui pattern;
+        citirea se oprește când toate secțiunile au fost găsite. Textul complet este păstrat doar cât timp
+        nu s-a găsit nicio secțiune, pentru Full_Text.
+
+        Returnează (secțiuni, textul complet sau None dacă s-a găsit o secțiune)
+        """
+        matchers = [_SectionMatcher(section_name, i, pattern)
+                    for section_name, patterns in self.sections_patterns.items()
+                    for i, pattern in enumerate(patterns)]
+        found = {}
+        full_text = []
+        buffer = ""
+        base = 0
+        total_len = 0
+
+        def batches():
+            pending = []
+            pending_len = 0
+            for block in text_blocks:
+                pending.append(block)
+                pending_len += len(block)
+                if pending_len >= self.SEARCH_BATCH:
+                    yield " ".join(pending)
+                    pending = []
+                    pending_len = 0
+            if pending:
+                yield " ".join(pending)
+
+        def advance(final):
+            for matcher in matchers:
+                if not matcher.active or not matcher.advance(buffer, base, final, self.MATCH_MARGIN):
+                    continue
+                logging.debug(f"  Patternul {matcher.index+1} pentru '{matcher.section_name}' a găsit potrivire. Lungime text extras (brut): {len(matcher.text)}")
+                found.setdefault(matcher.section_name, {})[matcher.index] = matcher.text
+                # pattern-urile următoare ale secțiunii nu mai sunt necesare
+                for other in matchers:
+                    if other.section_name == matcher.section_name and other.index > matcher.index:
+                        other.active = False
+
+        # O secțiune este sigur extrasă când primul pattern al ei care nu a eșuat s-a terminat cu text
+        def section_extracted():
+            for section_name in self.sections_patterns:
+                candidates = [matcher for matcher in matchers
+                              if matcher.section_name == section_name and (matcher.active or matcher.text is not None)]
+                if candidates and not candidates[0].active and candidates[0].text:
+                    return True
+            return False
+
+        for block in batches():
+            if total_len:
+                block = " " + block
+            total_len += len(block)
+            buffer += block
+            if full_text is not None:
+                full_text.append(block)
+            advance(final=False)
+            if full_text is not None and section_extracted():
+                full_text = None
+            active = [matcher.needed_from() for matcher in matchers if matcher.active]
+            if not active and full_text is None:
+                break
+            keep_from = min(active) if active else total_len
+            buffer = buffer[keep_from - base:]
+            base = keep_from
+        else:
+            advance(final=True)
+        logging.debug(f"Lungimea textului citit pentru extragerea secțiunilor: {total_len}")
+
+        sections = {}
+        for section_name in self.sections_patterns:
+            logging.debug(f"Încerc extragerea secțiunii: {section_name}")
+            # primul pattern care s-a potrivit decide, chiar dacă textul extras este gol (ca în extract_sections)
+            section_text = found[section_name][min(found[section_name])] if section_name in found else ""
+            if section_text:
+                sections[section_name] = self._clean_section(section_name, section_text)
+            else:
+                logging.warning(f"Nu s-a putut extrage secțiunea: {section_name} folosind niciun pattern.")
+
+        return sections, ("".join(full_text) if full_text is not None else None)
+
+    def _clean_section(self, section_name, section_text):
+        """Curățarea textului unei secțiuni extrase"""
+        original_len = len(section_text)
+        section_text = re.sub(r'\s+', ' ', section_text)
+        section_text = re.sub(r'\.{2,}', '.', section_text)
+        section_text = re.sub(r'\([Pp]age\s*\d+\)', '', section_text)
+        section_text = re.sub(r'\d+\s*of\s*\d+', '', section_text)
+        logging.debug(f"  Secțiunea '{section_name}': Lungime după curățare: {len(section_text)} (original: {original_len})")
+
+        if len(section_text.strip()) < 10: # Adaugă o verificare aici
+            logging.warning(f"  Secțiunea '{section_name}' extrasă are text foarte scurt după curățare (lungime: {len(section_text.strip())}). Text: '{section_text[:100]}...'")
+        return section_text
+
     def extract_sections(self, text):
         """Extrage secțiunile importante din textul raportului 10-K"""
         sections = {}
@@ -166,18 +390,7 @@ class HTML10KProcessor:
                     logging.error(f"  Eroare la căutarea cu patternul {i+1} pentru '{section_name}': {e}")
 
             if section_text:
-                # Curățare text suplimentară (codul tău existent)
-                original_len = len(section_text)
-                section_text = re.sub(r'\s+', ' ', section_text)
-                section_text = re.sub(r'\.{2,}', '.', section_text)
-                section_text = re.sub(r'\([Pp]age\s*\d+\)', '', section_text)
-                section_text = re.sub(r'\d+\s*of\s*\d+', '', section_text)
-                logging.debug(f"  Secțiunea '{section_name}': Lungime după curățare: {len(section_text)} (original: {original_len})")
-
-                if len(section_text.strip()) < 10: # Adaugă o verificare aici
-                    logging.warning(f"  Secțiunea '{section_name}' extrasă are text foarte scurt după curățare (lungime: {len(section_text.strip())}). Text: '{section_text[:100]}...'")
-
-                sections[section_name] = section_text
+                sections[section_name] = self._clean_section(section_name, section_text)
             else:
                 logging.warning(f"Nu s-a putut extrage secțiunea: {section_name} folosind niciun pattern.")
 
@@ -186,13 +399,20 @@ class HTML10KProcessor:
     def process_file(self, file_path):
         """Procesează un fișier 10-K și extrage secțiunile importante"""
         logging.info(f"Procesare fișier: {file_path}")
-        text = self.extract_text_from_html(file_path)
-        if not text:
+        if self.streaming:
+            try:
+                sections, text = self.extract_sections_streaming(self.iter_text_blocks(file_path))
+            except Exception as e:
+                logging.error(f"Eroare la citirea fișierului HTML {file_path}: {e}")
+                sections, text = {}, ""
+        else:
+            text = self.extract_text_from_html(file_path)
+            sections = self.extract_sections(text) if text else {}
+
+        if not sections and not text:
             logging.error(f"Extragerea textului din {file_path} a eșuat sau a returnat text gol.")
             return {"Full_Text": ""} # Returnează text gol pentru a evita erori ulterioare, dar va da scor neutru
 
-        sections = self.extract_sections(text)
-
         if not sections:
             logging.warning(f"Nu s-au găsit secțiuni specifice în {file_path}. Se folosește Full_Text. Lungime Full_Text: {len(text)}")
             sections["Full_Text"] = text # Full_Text ar trebui să fie textul curățat deja la nivel de bază
@@ -203,9 +423,10 @@ class RoBERTaFinanceAnalyzer:
     """
     Clasă pentru analiza de sentiment a textelor financiare folosind RoBERTa Finance
     """
-    def __init__(self, model_name="yiyanghkust/finbert-tone", device=None):
+    def __init__(self, model_name="yiyanghkust/finbert-tone", device=None, batch_size=16):
         """
         Inițializează analizorul cu modelul specificat.
+        batch_size este numărul implicit de ferestre de tokeni evaluate într-un singur forward pass.
         
         Pentru modele financiare se pot folosi:
         - "yiyanghkust/finbert-tone" pentru analiza tonului (pozitiv/negativ/neutru)
@@ -229,91 +450,244 @@ class RoBERTaFinanceAnalyzer:
         else:
             self.labels = ["Negative", "Neutral", "Positive"]  # Default pentru alte modele
         
+        self.batch_size = batch_size
+
         # Inițializăm un lock pentru a gestiona accesul la model în cazul procesării paralele
         self.model_lock = threading.Lock()
 
-    def analyze_text(self, text, chunk_size=512, overlap=50):
+    def split_into_token_windows(self, input_ids, chunk_size=512, overlap=50):
+        """
+        Taie id-urile tokenilor unui text în ferestre de chunk_size tokeni (inclusiv tokenii de început
+        și de sfârșit ai modelului), consecutive ferestre având `overlap` tokeni în comun.
+        Fereastra următoare începe la chunk_size - 2 - overlap tokeni după cea curentă.
+        """
+        window = chunk_size - 2
+        stride = window - overlap
+        if stride <= 0:
+            raise ValueError(f"overlap ({overlap}) trebuie să fie mai mic decât fereastra de {window} tokeni")
+
+        input_ids = np.asarray(input_ids, dtype=np.int64)
+        n_windows = max(1, -(-(len(input_ids) - overlap) // stride))
+        first, last = [self.tokenizer.cls_token_id], [self.tokenizer.sep_token_id]
+        return [first + input_ids[start:start + window].tolist() + last
+                for start in range(0, n_windows * stride, stride)]
+
+    def score_windows(self, windows, batch_size=None):
+        """
+        Calculează probabilitățile fiecărei ferestre de tokeni, returnează un array (număr ferestre x număr etichete).
+
+        Ferestrele sunt sortate după numărul de tokeni, astfel încât fiecare batch de `batch_size`
+        ferestre este completat (padding) doar până la cea mai lungă din batch.
+        """
+        batch_size = batch_size or self.batch_size
+        order = np.argsort([-len(ids) for ids in windows], kind="stable")
+        scores = np.empty((len(windows), len(self.labels)), dtype=np.float32)
+
+        with self.model_lock:  # Folosim lock pentru a evita accesul simultan la model
+            with torch.no_grad():
+                for start in range(0, len(order), batch_size):
+                    batch_indices = order[start:start + batch_size]
+                    inputs = self.tokenizer.pad({"input_ids": [windows[i] for i in batch_indices]},
+                                                return_tensors="pt").to(self.device)
+                    outputs = self.model(**inputs)
+                    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                    scores[batch_indices] = probs.cpu().numpy()
+
+        logging.debug(f"{len(windows)} ferestre evaluate în {-(-len(windows) // batch_size)} batch-uri de maxim {batch_size}.")
+        return scores
+
+    def analyze_texts(self, texts, chunk_size=512, overlap=50, batch_size=None):
+        """
+        Analizează mai multe texte (ex: secțiunile unuia sau mai multor rapoarte) și returnează
+        lista scorurilor de sentiment, în aceeași ordine.
+
+        Fiecare text este tokenizat o singură dată și tăiat în ferestre de tokeni; ferestrele
+        tuturor textelor sunt evaluate împreună, pe batch-uri, apoi scorurile sunt mediate pentru fiecare text.
+        """
+        results = [None] * len(texts)
+        positions = []
+
+        for position, text in enumerate(texts):
+            stripped_text_len = len(text.strip()) if text else 0
+            logging.debug(f"analyze_text primit. Lungime text (după strip): {stripped_text_len}. Primii 50 caractere: '{text.strip()[:50] if text else ''}'")
+
+            if not text or stripped_text_len < 10:
+                logging.warning(f"Textul este prea scurt (lungime: {stripped_text_len}) pentru analiză RoBERTa. Se returnează scorul neutru implicit.")
+                results[position] = {"Negative": 0.33, "Neutral": 0.34, "Positive": 0.33}  # Scor neutru implicit
+            else:
+                positions.append(position)
+
+        if not positions:
+            return results
+
+        # Tokenizarea tuturor textelor odată, fără tokeni speciali și fără trunchiere
+        encodings = self.tokenizer([texts[position] for position in positions],
+                                   add_special_tokens=False, verbose=False)["input_ids"]
+        all_windows = []
+        window_owners = []
+        for position, input_ids in zip(positions, encodings):
+            windows = self.split_into_token_windows(input_ids, chunk_size, overlap)
+            logging.debug(f"Textul are {len(input_ids)} tokeni, împărțiți în {len(windows)} ferestre.")
+            all_windows.extend(windows)
+            window_owners.extend([position] * len(windows))
+
+        scores = self.score_windows(all_windows, batch_size)
+        window_owners = np.array(window_owners)
+        for position in positions:
+            # Calculează media scorurilor ferestrelor textului
+            avg_scores = scores[window_owners == position].mean(axis=0)
+            results[position] = {label: float(score) for label, score in zip(self.labels, avg_scores)}
+            logging.debug(f"Scoruri medii calculate: {results[position]}")
+
+        return results
+
+    def analyze_text(self, text, chunk_size=512, overlap=50, batch_size=None):
         """
         Analizează textul și returnează scoreurile de sentiment
         
         Args:
             text: Textul de analizat
-            chunk_size: Dimensiunea maximă a unui chunk pentru a se încadra în limitele modelului
-            overlap: Suprapunerea între chunk-uri pentru a menține contextul
+            chunk_size: Numărul de tokeni al unei ferestre, limita modelului (512)
+            overlap: Numărul de tokeni comuni între ferestre consecutive pentru a menține contextul
+            batch_size: Numărul de ferestre evaluate într-un forward pass (implicit cel din constructor)
         """
-        stripped_text_len = len(text.strip()) if text else 0
-        logging.debug(f"analyze_text primit. Lungime text (după strip): {stripped_text_len}. Primii 50 caractere: '{text.strip()[:50]}'")
-
-        if not text or len(text.strip()) < 10:
-            logging.warning(f"Textul este prea scurt (lungime: {stripped_text_len}) pentru analiză RoBERTa. Se returnează scorul neutru implicit.")
-            return {"Negative": 0.33, "Neutral": 0.34, "Positive": 0.33}  # Scor neutru implicit
-        
-        # Împarte textul în propoziții
-        sentences = sent_tokenize(text)
-        
-        # Preprocesarea și împărțirea textului în chunk-uri care se încadrează în limitele modelului
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            # Dacă adăugarea propoziției ar depăși chunk_size, adaugă chunk-ul curent și începe unul nou
-            if len(current_chunk) + len(sentence) > chunk_size - overlap:
-                chunks.append(current_chunk.strip())
-                # Păstrează ultima parte a chunk-ului curent pentru suprapunere
-                words = current_chunk.split()
-                if len(words) > overlap:
-                    current_chunk = " ".join(words[-overlap:]) + " " + sentence
-                else:
-                    current_chunk = sentence
-            else:
-                current_chunk += " " + sentence
-        
-        # Adaugă ultimul chunk dacă nu este gol
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        logging.debug(f"Textul a fost împărțit în {len(sentences)} propoziții și {len(chunks)} chunk-uri.")
+        return self.analyze_texts([text], chunk_size, overlap, batch_size)[0]
+    
+def file_sha256(file_path, block_size=1 << 20):
+    """Hash-ul SHA-256 al conținutului fișierului, citit pe blocuri"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-        # Dacă nu există chunk-uri (text foarte scurt), adaugă textul ca un singur chunk
-        if not chunks: # Adăugat pentru a prinde cazul când nu se formează chunks din text valid
-            logging.warning(f"Nu s-au format chunk-uri din text (lungime: {stripped_text_len}). Se returnează scorul neutru implicit.")
-            return {"Negative": 0.33, "Neutral": 0.34, "Positive": 0.33}
-        
-        # Vectorii pentru a stoca rezultatele
-        all_scores = []
+# Ponderea fiecărei secțiuni în scorul general al unui raport
+SECTION_WEIGHTS = {
+    "MD&A": 0.4,
+    "Risk_Factors": 0.3,
+    "Business": 0.15,
+    "Financial_Discussion": 0.15,
+    "Full_Text": 1.0  # Dacă folosim textul complet
+}
+
+def summarize_filing_sentiment(file_path, ticker, sections, sentiments):
+    """
+    Combină scorurile secțiunilor unui raport (în ordinea din sections) în rezultatul raportului:
+    scorurile fiecărei secțiuni, scorurile generale ponderate, Sentiment_Score, Confidence și anul
+    """
+    results = {"ticker": ticker}
+    
+    weighted_positive = 0
+    weighted_negative = 0
+    weighted_neutral = 0
+    total_weight = 0
+    
+    # Analizează fiecare secțiune
+    for section_name, sentiment in zip(sections, sentiments):
+        # Adaugă la rezultate
+        for label, score in sentiment.items():
+            results[f"{section_name}_{label}"] = score
         
-        # Procesează fiecare chunk
-        with self.model_lock:  # Folosim lock pentru a evita accesul simultan la model
-            with torch.no_grad():
-                for chunk in chunks:
-                    # Tokenizează și obține predicția
-                    inputs = self.tokenizer(chunk, return_tensors="pt", truncation=True, max_length=512).to(self.device)
-                    outputs = self.model(**inputs)
-                    
-                    # Obține scorurile pentru fiecare clasă
-                    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                    scores = probs[0].cpu().numpy()
-                    
-                    # Adaugă la rezultate
-                    all_scores.append(scores)
-        
-        # Calculează media scorurilor
-        if not all_scores: # Dacă, din diverse motive, nu s-a adăugat niciun scor
-            logging.warning("Lista all_scores este goală după procesarea chunk-urilor. Se returnează distribuție uniformă.")
-            return {label: 1/len(self.labels) for label in self.labels}
-
-        avg_scores = np.mean(all_scores, axis=0)
-        result = {label: float(score) for label, score in zip(self.labels, avg_scores)}
-        logging.debug(f"Scoruri medii calculate: {result}")
-        return result
+        # Calculează scorurile ponderate
+        weight = SECTION_WEIGHTS.get(section_name, 0)
+        if section_name != "Full_Text" or len(sections) == 1:
+            weighted_positive += sentiment.get("Positive", 0) * weight
+            weighted_negative += sentiment.get("Negative", 0) * weight
+            weighted_neutral += sentiment.get("Neutral", 0) * weight
+            total_weight += weight
     
+    # Normalizează scorurile generale
+    if total_weight > 0:
+        overall_positive = weighted_positive / total_weight
+        overall_negative = weighted_negative / total_weight
+        overall_neutral = weighted_neutral / total_weight
+    else:
+        overall_positive = 0
+        overall_negative = 0
+        overall_neutral = 0
+    
+    # Adaugă scorurile generale la rezultate
+    results["Overall_Positive"] = overall_positive
+    results["Overall_Negative"] = overall_negative
+    results["Overall_Neutral"] = overall_neutral
+    
+    # Calculează scoruri derivate
+    results["Sentiment_Score"] = overall_positive - overall_negative
+    results["Confidence"] = 1 - overall_neutral
+    
+    # Extras anul din calea fișierului
+    year_match = re.search(r'(\d{4})', os.path.basename(file_path))
+    if year_match:
+        results["year"] = year_match.group(1)
+    else:
+        results["year"] = "N/A"
+    
+    return results
+
+
+def _extraction_worker(file_queue, section_queue):
+    """Procesul de extragere al pipeline-ului: (index, ticker, fișier) -> (index, ticker, fișier, secțiuni, eroare)"""
+    processor = HTML10KProcessor()
+    while True:
+        item = file_queue.get()
+        if item is None:
+            break
+        index, ticker, file_path = item
+        try:
+            section_queue.put((index, ticker, file_path, processor.process_file(file_path), None))
+        except Exception as e:
+            logging.error(f"Eroare la extragerea secțiunilor din {file_path} pentru {ticker}: {e}")
+            section_queue.put((index, ticker, file_path, None, str(e)))
+
+def _inference_worker(section_queue, result_queue, model_name, batch_size, chunk_size, overlap, torch_threads):
+    """Procesul de inferență al pipeline-ului: încarcă modelul o dată și analizează secțiunile rapoartelor"""
+    torch.set_num_threads(torch_threads)
+    try:
+        analyzer = RoBERTaFinanceAnalyzer(model_name, batch_size=batch_size)
+    except Exception as e:
+        logging.error(f"Eroare la încărcarea modelului {model_name}: {e}")
+        analyzer = None
+
+    while True:
+        item = section_queue.get()
+        if item is None:
+            break
+        index, ticker, file_path, sections, error = item
+        section_scores = None
+        if analyzer is None:
+            error = error or f"Modelul {model_name} nu a putut fi încărcat"
+        if error is None:
+            try:
+                sentiments = analyzer.analyze_texts(list(sections.values()), chunk_size, overlap)
+                result = summarize_filing_sentiment(file_path, ticker, sections, sentiments)
+                if any(sections.values()):
+                    section_scores = list(zip(sections, sentiments))
+            except Exception as e:
+                logging.error(f"Eroare la analiza fișierului {file_path} pentru {ticker}: {e}")
+                error = str(e)
+        if error is not None:
+            result = {"ticker": ticker, "error": error}
+        result_queue.put((index, result, section_scores))
+    # semnalează procesului principal că acest worker a terminat
+    result_queue.put(None)
+
 class SentimentAnalysisManager:
     """
     Clasă pentru gestionarea analizei de sentiment pentru mai multe companii
     """
-    def __init__(self, filings_dir="./sec_edgar_fillings", output_dir="./sentiment_results"):
+    def __init__(self, filings_dir="./sec_edgar_fillings", output_dir="./sentiment_results",
+                 model_name="yiyanghkust/finbert-tone", batch_size=16, chunk_size=512, overlap=50, use_cache=True):
+        """
+        use_cache: scorurile secțiunilor sunt salvate în baza de date după hash-ul documentului, modelul
+                   și chunk_size/overlap; un document deja analizat nu mai este parsat și evaluat din nou
+        """
         self.filings_dir = filings_dir
         self.output_dir = output_dir
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.use_cache = use_cache
         
         # Creează directorul de output dacă nu există
         if not os.path.exists(output_dir):
@@ -322,17 +696,36 @@ class SentimentAnalysisManager:
         # Inițializează procesorul de documente
         self.processor = HTML10KProcessor()
         
-        # Creează un model RoBERTa Finance pentru fiecare worker
-        # Pentru a evita problemele de memorie și pentru a permite paralelizarea
-        self.analyzer = RoBERTaFinanceAnalyzer()
+        # Modelul este încărcat doar la prima analiză făcută în acest proces;
+        # analyze_all_companies încarcă câte un model în fiecare proces de inferență
+        self._analyzer = None
         
         # Conectare la baza de date
         try:
+            from database.DatabaseCRUD import DatabaseCRUD
             self.db_crud = DatabaseCRUD()
         except Exception as e:
             logging.error(f"Eroare la conectarea la baza de date: {e}")
             self.db_crud = None
 
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = RoBERTaFinanceAnalyzer(self.model_name, batch_size=self.batch_size)
+        return self._analyzer
+
+    def load_cached_scores(self, content_hashes):
+        """content_hash -> scorurile secțiunilor documentelor deja analizate cu modelul și chunking-ul curent"""
+        if not self.use_cache or self.db_crud is None:
+            return {}
+        return self.db_crud.select_sentiment_scores(content_hashes, self.model_name, self.chunk_size, self.overlap)
+
+    def save_scores(self, scores):
+        """Salvează scorurile secțiunilor (content_hash -> [(secțiune, scoruri), ...]) pentru rulările următoare"""
+        if not self.use_cache or self.db_crud is None or not scores:
+            return 0
+        return self.db_crud.insert_sentiment_scores(self.model_name, self.chunk_size, self.overlap, scores)
+
     def find_filing_files(self, ticker, filing_type="10-K"):
         """
         Finds filing files for a specific ticker and report type
@@ -423,67 +816,21 @@ class SentimentAnalysisManager:
             Dict cu rezultatele analizei
         """
         try:
+            content_hash = file_sha256(file_path)
+            cached = self.load_cached_scores([content_hash]).get(content_hash)
+            if cached:
+                logging.info(f"Raportul {file_path} a fost deja analizat, se folosesc scorurile salvate")
+                sections, sentiments = zip(*cached)
+                return summarize_filing_sentiment(file_path, ticker, sections, sentiments)
+
             # Procesăm fișierul pentru a extrage secțiunile
             sections = self.processor.process_file(file_path)
             
-            # Analizăm fiecare secțiune
-            results = {"ticker": ticker}
-            section_weights = {
-                "MD&A": 0.4,
-                "Risk_Factors": 0.3,
-                "Business": 0.15,
-                "Financial_Discussion": 0.15,
-                "Full_Text": 1.0  # Dacă folosim textul complet
-            }
-            
-            weighted_positive = 0
-            weighted_negative = 0
-            weighted_neutral = 0
-            total_weight = 0
-            
-            # Analizează fiecare secțiune
-            for section_name, section_text in sections.items():
-                sentiment = self.analyzer.analyze_text(section_text)
-                
-                # Adaugă la rezultate
-                for label, score in sentiment.items():
-                    results[f"{section_name}_{label}"] = score
-                
-                # Calculează scorurile ponderate
-                weight = section_weights.get(section_name, 0)
-                if section_name != "Full_Text" or len(sections) == 1:
-                    weighted_positive += sentiment.get("Positive", 0) * weight
-                    weighted_negative += sentiment.get("Negative", 0) * weight
-                    weighted_neutral += sentiment.get("Neutral", 0) * weight
-                    total_weight += weight
-            
-            # Normalizează scorurile generale
-            if total_weight > 0:
-                overall_positive = weighted_positive / total_weight
-                overall_negative = weighted_negative / total_weight
-                overall_neutral = weighted_neutral / total_weight
-            else:
-                overall_positive = 0
-                overall_negative = 0
-                overall_neutral = 0
-            
-            # Adaugă scorurile generale la rezultate
-            results["Overall_Positive"] = overall_positive
-            results["Overall_Negative"] = overall_negative
-            results["Overall_Neutral"] = overall_neutral
-            
-            # Calculează scoruri derivate
-            results["Sentiment_Score"] = overall_positive - overall_negative
-            results["Confidence"] = 1 - overall_neutral
-            
-            # Extras anul din calea fișierului
-            year_match = re.search(r'(\d{4})', os.path.basename(file_path))
-            if year_match:
-                results["year"] = year_match.group(1)
-            else:
-                results["year"] = "N/A"
-            
-            return results
+            # Analizează toate secțiunile împreună, ferestrele lor de tokeni sunt evaluate în aceleași batch-uri
+            sentiments = self.analyzer.analyze_texts(list(sections.values()), self.chunk_size, self.overlap)
+            if any(sections.values()):
+                self.save_scores({content_hash: list(zip(sections, sentiments))})
+            return summarize_filing_sentiment(file_path, ticker, sections, sentiments)
         
         except Exception as e:
             logging.error(f"Eroare la analiza fișierului {file_path} pentru {ticker}: {e}")
@@ -513,13 +860,21 @@ class SentimentAnalysisManager:
         
         return results
     
-    def analyze_all_companies(self, tickers=None, max_workers=4):
+    def analyze_all_companies(self, tickers=None, max_workers=4, extract_workers=2, torch_threads=None, queue_size=16):
         """
         Analizează toate companiile
         
+        Rapoartele trec printr-un pipeline de procese legate prin cozi de dimensiune limitată:
+        descoperirea fișierelor (procesul curent) -> extragerea textului și a secțiunilor
+        (extract_workers procese) -> inferența (max_workers procese, fiecare cu propriul model).
+        
         Args:
             tickers: Lista de ticker-uri (dacă None, se vor lua din baza de date)
-            max_workers: Numărul maxim de thread-uri pentru procesare paralelă
+            max_workers: Numărul de procese de inferență, fiecare încarcă o copie a modelului
+            extract_workers: Numărul de procese care extrag textul din HTML
+            torch_threads: Thread-urile torch (intra-op) ale fiecărui proces de inferență,
+                           implicit nucleele disponibile împărțite la max_workers
+            queue_size: Numărul maxim de rapoarte care așteaptă în fiecare coadă
             
         Returns:
             DataFrame cu rezultatele analizei
@@ -532,21 +887,42 @@ class SentimentAnalysisManager:
             logging.error("Nu s-au găsit ticker-uri pentru analiză")
             return pd.DataFrame()
         
-        all_results = []
+        # Etapa 1: descoperirea rapoartelor
+        filings = []
+        for ticker in tickers:
+            filing_files = self.find_filing_files(ticker)
+            if not filing_files:
+                logging.warning(f"Nu s-au găsit rapoarte pentru {ticker}")
+            filings.extend((ticker, file_path) for file_path in filing_files)
         
-        # Folosim ThreadPoolExecutor pentru procesare paralelă
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Pregătim task-urile pentru fiecare companie
-            futures = {executor.submit(self.analyze_company, ticker): ticker for ticker in tickers}
-            
-            # Procesăm rezultatele pe măsură ce sunt finalizate
-            for future in tqdm(futures, desc="Analizând companiile"):
-                ticker = futures[future]
-                try:
-                    company_results = future.result()
-                    all_results.extend(company_results)
-                except Exception as e:
-                    logging.error(f"Eroare la analiza companiei {ticker}: {e}")
+        # Rapoartele deja analizate (același conținut, model și chunking) sunt luate din baza de date
+        all_results = [None] * len(filings)
+        content_hashes = []
+        for ticker, file_path in filings:
+            try:
+                content_hashes.append(file_sha256(file_path))
+            except OSError as e:
+                logging.error(f"Eroare la citirea fișierului {file_path}: {e}")
+                content_hashes.append(None)
+        cached = self.load_cached_scores(content_hash for content_hash in content_hashes if content_hash)
+        to_analyze = []
+        for index, ((ticker, file_path), content_hash) in enumerate(zip(filings, content_hashes)):
+            if content_hash in cached:
+                sections, sentiments = zip(*cached[content_hash])
+                all_results[index] = summarize_filing_sentiment(file_path, ticker, sections, sentiments)
+            else:
+                to_analyze.append(index)
+        logging.info(f"{len(filings) - len(to_analyze)} rapoarte luate din rezultatele salvate, {len(to_analyze)} de analizat")
+        
+        if to_analyze:
+            results, section_scores = self.run_pipeline([filings[index] for index in to_analyze],
+                                                        max_workers, extract_workers, torch_threads, queue_size)
+            new_scores = {}
+            for index, result, scores in zip(to_analyze, results, section_scores):
+                all_results[index] = result
+                if scores is not None and content_hashes[index] is not None:
+                    new_scores[content_hashes[index]] = scores
+            self.save_scores(new_scores)
         
         # Creăm un DataFrame cu toate rezultatele
         if all_results:
@@ -565,6 +941,96 @@ class SentimentAnalysisManager:
             logging.warning("Nu s-au obținut rezultate de la analiza de sentiment")
             return pd.DataFrame()
     
+    def run_pipeline(self, filings, max_workers=4, extract_workers=2, torch_threads=None, queue_size=16):
+        """
+        Analizează lista de rapoarte (ticker, cale fișier) în procese separate și returnează
+        rezultatele și scorurile secțiunilor ([(secțiune, scoruri), ...], None pentru un raport eșuat)
+        în ordinea din filings.
+        """
+        # spawn: procesele nu moștenesc starea torch/CUDA a procesului curent (și este singura variantă pe Windows)
+        context = multiprocessing.get_context("spawn")
+        model_workers = max(1, min(max_workers, len(filings)))
+        extract_workers = max(1, min(extract_workers, len(filings)))
+        if torch_threads is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // model_workers)
+        logging.info(f"Pipeline: {len(filings)} rapoarte, {extract_workers} procese de extragere, "
+                     f"{model_workers} procese de inferență cu {torch_threads} thread-uri torch fiecare")
+        
+        file_queue = context.Queue(queue_size)
+        section_queue = context.Queue(queue_size)
+        result_queue = context.Queue()
+        extractors = [context.Process(target=_extraction_worker, args=(file_queue, section_queue), daemon=True)
+                      for _ in range(extract_workers)]
+        models = [context.Process(target=_inference_worker,
+                                  args=(section_queue, result_queue, self.model_name, self.batch_size,
+                                        self.chunk_size, self.overlap, torch_threads),
+                                  daemon=True)
+                  for _ in range(model_workers)]
+        for process in extractors + models:
+            process.start()
+        
+        # Cozile sunt limitate: un put așteaptă cât timp măcar unul dintre procesele care le golesc trăiește.
+        # Returnează False dacă toate s-au oprit (de ex. un proces omorât de sistem).
+        def put_while_alive(target_queue, item, consumers):
+            while True:
+                try:
+                    target_queue.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    if not any(process.is_alive() for process in consumers):
+                        return False
+        
+        # Rapoartele sunt trimise dintr-un thread, procesul curent colectează rezultatele în paralel
+        def feed():
+            for index, (ticker, file_path) in enumerate(filings):
+                if not put_while_alive(file_queue, (index, ticker, file_path), extractors):
+                    break
+            for _ in extractors:
+                put_while_alive(file_queue, None, extractors)
+            for process in extractors:
+                process.join()
+            crashed = [process.exitcode for process in extractors if process.exitcode != 0]
+            if crashed:
+                # rapoartele rămase în lucru sau netrimise sunt raportate ca neanalizate
+                logging.error(f"Procese de extragere oprite cu codurile {crashed}")
+            # toate secțiunile au fost extrase, procesele de inferență se pot opri
+            for _ in models:
+                put_while_alive(section_queue, None, models)
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        
+        results = [None] * len(filings)
+        section_scores = [None] * len(filings)
+        finished_models = 0
+        with tqdm(total=len(filings), desc="Analizând rapoartele") as progress:
+            while finished_models < len(models):
+                try:
+                    item = result_queue.get(timeout=5)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in models):
+                        logging.error("Procesele de inferență s-au oprit înainte de a analiza toate rapoartele")
+                        break
+                    continue
+                if item is None:
+                    finished_models += 1
+                    continue
+                index, result, scores = item
+                results[index] = result
+                section_scores[index] = scores
+                progress.update(1)
+        
+        for process in models:
+            process.join(timeout=5)
+        # după oprirea proceselor de inferență, extractorii pot rămâne blocați pe coada de secțiuni
+        for process in extractors + models:
+            if process.is_alive():
+                process.terminate()
+        
+        for index, (ticker, file_path) in enumerate(filings):
+            if results[index] is None:
+                results[index] = {"ticker": ticker, "error": f"Raportul {file_path} nu a fost analizat"}
+        return results, section_scores
+    
     def generate_investment_recommendations(self, results_df=None):
         """
         Generează recomandări de investiții pe baza analizei de sentiment
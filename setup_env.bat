@@ -13,7 +13,7 @@ pip install tensorflow==2.15.0
 
 REM Poți instala și alte pachete aici
 REM 
-pip install streamlit pandas matplotlib
+pip install streamlit pandas matplotlib aiohttp
 
 echo.
 echo 🔁 Mediu virtual creat și TensorFlow instalat cu succes!
@@ -0,0 +1,36 @@
+class FinancialSnapshot:
+    """
+    In-memory view of every financial statement stored for one company,
+    indexed by (statement_type, year) and then by record_type.
+
+    Values are kept exactly as they come out of the financialData table, so the
+    metrics reading from the snapshot can keep their existing 'None' checks.
+    """
+    def __init__(self, company_id, rows):
+        self.company_id = company_id
+        self._statements = {}
+        for year, statement_type, record_type, record_value in rows:
+            records = self._statements.setdefault((statement_type, year), {})
+            if record_type is not None:
+                records[record_type] = record_value
+
+    @classmethod
+    def load(cls, db_crud, ticker):
+        company_id = db_crud.select_company(ticker)
+        if company_id is None:
+            return cls(None, [])
+        return cls(company_id, db_crud.select_financial_snapshot(company_id))
+
+    # Equivalent of select_financial_statement(...) is not None
+    def has_statement(self, statement_type, year):
+        return (statement_type, year) in self._statements
+
+    # Equivalent of select_financial_data(select_financial_statement(...), record_type)
+    def get(self, statement_type, year, record_type):
+        records = self._statements.get((statement_type, year))
+        if records is None:
+            return None
+        return records.get(record_type)
+
+    def years(self, statement_type):
+        return sorted(year for (s_type, year) in self._statements if s_type == statement_type)
@@ -0,0 +1,137 @@
+from utils.Constants import *
+
+PASS = "pass"
+SKIP = "skip"
+FAIL = "fail"
+
+class Criterion:
+    """
+    One screening test.
+
+    metric    - function(stock) returning the value the test is based on; the Stock
+                memoizes its metrics, so every value is computed only once per stock
+    check     - function(value) returning True when the stock passes the test
+    cost      - relative cost of computing the metric, cheaper criteria run first
+    is_missing - function(value) returning True when there is no data for the test (skip)
+    applies   - function(stock) returning False when the test does not apply to the stock (skip)
+    """
+    def __init__(self, name, metric, check, cost, is_missing=None, applies=None, missing_message=None, not_applicable_message=None):
+        self.name = name
+        self.metric = metric
+        self.check = check
+        self.cost = cost
+        self.is_missing = is_missing
+        self.applies = applies
+        self.missing_message = missing_message or f"for the {name}"
+        self.not_applicable_message = not_applicable_message
+
+    def evaluate(self, stock):
+        if self.applies is not None and not self.applies(stock):
+            print(f"{stock.ticker} {self.not_applicable_message}")
+            return SKIP
+
+        try:
+            value = self.metric(stock)
+            if self.is_missing is not None and self.is_missing(value):
+                print(f"{stock.ticker} has no data available {self.missing_message}. Test skipped")
+                return SKIP
+            if self.check(value):
+                return PASS
+        except Exception as e:
+            print(f"Error evaluating '{self.name}' for {stock.ticker}: {e}")
+
+        print(f"-->{stock.ticker} failed the test '{self.name}'")
+        return FAIL
+
+class CriteriaPipeline:
+    """Runs the criteria cheapest-first and stops at the first failure"""
+    def __init__(self, criteria):
+        # sorted() is stable, so criteria with the same cost keep their declared order
+        self.criteria = sorted(criteria, key=lambda criterion: criterion.cost)
+
+    @property
+    def names(self):
+        return [criterion.name for criterion in self.criteria]
+
+    # Returns (passed, outcomes) where outcomes maps every criterion that was run to pass/skip/fail
+    def run(self, stock):
+        outcomes = {}
+        for criterion in self.criteria:
+            outcome = criterion.evaluate(stock)
+            outcomes[criterion.name] = outcome
+            if outcome == FAIL:
+                return False, outcomes
+        return True, outcomes
+
+def _is_zero(value):
+    return value == 0
+
+def _check_price_to_book(values):
+    price_to_book_ratio, price_to_book_ratio_graham = values
+    return (0 < price_to_book_ratio <= PRICE_TO_BOOK_RATIO or
+            0 < price_to_book_ratio_graham <= PRICE_TO_BOOK_RATIO_GRAHAM)
+
+# earnings_stability returns 0 when the company is missing and True/False otherwise,
+# so only a non-boolean 0 means that there is no data to check
+def _is_missing_earnings_stability(value):
+    return value is None or (value == 0 and not isinstance(value, bool))
+
+# Cost = extra lookups (sector, last price, dividend CSV index) plus statement-years read by the metric
+DEFAULT_CRITERIA = [
+    Criterion(
+        "Current Ratio",
+        metric=lambda stock: stock.metric('get_current_ratio'),
+        check=lambda value: float(value) >= MIN_CURRENT_RATIO,
+        cost=2,
+        is_missing=_is_zero,
+        applies=lambda stock: stock.metric('get_sector') != "Utilities",
+        missing_message="for the current ratio",
+        not_applicable_message="is a utility company. Current ratio test skipped",
+    ),
+    Criterion(
+        "Market Cap",
+        metric=lambda stock: stock.metric('get_market_cap'),
+        check=lambda value: float(value) >= MIN_MARKET_CAP,
+        cost=2,
+        is_missing=_is_zero,
+        missing_message="for the market capitalization",
+    ),
+    Criterion(
+        "P/E Ratio",
+        metric=lambda stock: stock.metric('compute_PE_ratio'),
+        check=lambda value: 0 < value <= PE_RATIO_THRESHOLD,
+        cost=5,
+        is_missing=_is_zero,
+        missing_message="for the P/E ratio",
+    ),
+    Criterion(
+        "Price-to-book ratio",
+        metric=lambda stock: (stock.metric('compute_price_to_book_ratio'), stock.metric('compute_price_to_book_ratio_graham')),
+        check=_check_price_to_book,
+        cost=6,
+        is_missing=lambda values: values[0] == 0 and values[1] == 0,
+        missing_message="for the price-to-book ratio (normal and graham)",
+    ),
+    Criterion(
+        "Dividend Record",
+        metric=lambda stock: stock.metric('get_dividend_record_from_excel', FILTERED_DIVIDEND_COMPANY_FILE_PATH),
+        check=lambda value: value >= INCREASED_DIVIDEND_RECORD,
+        cost=1,
+        is_missing=lambda value: value is None,
+        missing_message="for the dividend record",
+    ),
+    Criterion(
+        "Earnings Stability",
+        metric=lambda stock: stock.metric('earnings_stability'),
+        check=lambda value: bool(value),
+        cost=10,
+        is_missing=_is_missing_earnings_stability,
+        missing_message="to check the earnings stability",
+    ),
+    Criterion(
+        "Earnings Growth",
+        metric=lambda stock: stock.metric('earnings_growth_last_10_years'),
+        check=lambda value: value >= EARNINGS_GROWTH_THRESHOLD,
+        cost=6,
+    ),
+]
@@ -0,0 +1,85 @@
+import pandas as pd
+
+# Alpha Vantage endpoint of every statement type stored in the financialStatement table
+STATEMENT_FUNCTIONS = {
+    'income_statement': 'INCOME_STATEMENT',
+    'balance_sheet': 'BALANCE_SHEET',
+    'cash_flow_statement': 'CASH_FLOW',
+}
+
+# record_type stored in the database -> field of the Alpha Vantage annual report
+CASH_FLOW_FIELDS = {
+    'operatingCashFlow': 'operatingCashflow',
+    'capitalExpenditures': 'capitalExpenditures',
+    'cashFlowInvesting': 'cashflowFromInvestment',
+    'cashFlowFinancing': 'cashflowFromFinancing',
+    'dividendPayout': 'dividendPayout',
+    'dividendPayoutPreferredStock': 'dividendPayoutPreferredStock',
+    'changeInOperatingAssets': 'changeInOperatingAssets',
+    'changeInOperatingLiabilities': 'changeInOperatingLiabilities',
+}
+
+INCOME_STATEMENT_FIELDS = {
+    'grossProfit': 'grossProfit',
+    'revenue': 'totalRevenue',
+    'COGS': 'costofGoodsAndServicesSold',
+    'operatingIncome': 'operatingIncome',
+    'SG&A': 'sellingGeneralAndAdministrative',
+    'researchAndDevelopment': 'researchAndDevelopment',
+    'depreciationAndAmortization': 'depreciationAndAmortization',
+    'incomeBeforeTax': 'incomeBeforeTax',
+    'netIncomeFromContinuingOps': 'netIncomeFromContinuingOperations',
+    'ebit': 'ebit',
+    'netIncome': 'netIncome',
+    'interestExpense': 'interestExpense',
+}
+
+BALANCE_SHEET_FIELDS = {
+    'totalAssets': 'totalAssets',
+    'totalCurrentAssets': 'totalCurrentAssets',
+    'cashAndCashEquivalentsAtCarryingValue': 'cashAndCashEquivalentsAtCarryingValue',
+    'cashAndShortTermInvestments': 'cashAndShortTermInvestments',
+    'inventory': 'inventory',
+    'currentNetReceivables': 'currentNetReceivables',
+    'propertyPlantEquipment': 'propertyPlantEquipment',
+    'intagibleAssets': 'intangibleAssets',
+    'goodwill': 'goodwill',
+    'longTermInvestments': 'longTermInvestments',
+    'shortTermInvestments': 'shortTermInvestments',
+    'otherCurrentAssets': 'otherCurrentAssets',
+    'otherNonCurrentAssets': 'otherNonCurrentAssets',
+    'totalLiabilities': 'totalLiabilities',
+    'totalCurrentLiabilities': 'totalCurrentLiabilities',
+    'currentAccountsPayable': 'currentAccountsPayable',
+    'deferredRevenue': 'deferredRevenue',
+    'currentDebt': 'currentDebt',
+    'shortTermDebt': 'shortTermDebt',
+    'capitalLeaseObligations': 'capitalLeaseObligations',
+    'longTermDebt': 'longTermDebt',
+    'otherCurrentLiabilities': 'otherCurrentLiabilities',
+    'otherNonCurrentLiabilities': 'otherNonCurrentLiabilities',
+    'totalEquity': 'totalShareholderEquity',
+    'treasuryStock': 'treasuryStock',
+    'retainedEarnings': 'retainedEarnings',
+    'commonStock': 'commonStock',
+    'sharesOutstanding': 'commonStockSharesOutstanding',
+}
+
+STATEMENT_FIELDS = {
+    'income_statement': INCOME_STATEMENT_FIELDS,
+    'balance_sheet': BALANCE_SHEET_FIELDS,
+    'cash_flow_statement': CASH_FLOW_FIELDS,
+}
+
+# Build the statement DataFrame (one row per fiscal year, one column per record_type)
+# from the JSON returned by the API. Raises KeyError if the payload has no annual reports
+# or a report is missing one of the fields.
+def parse_statement(statement_type, data):
+    fields = STATEMENT_FIELDS[statement_type]
+    statement = {}
+    for report in data['annualReports']:
+        date = report['fiscalDateEnding'].split('-')[0]
+        statement[date] = {record_type: report[api_field] for record_type, api_field in fields.items()}
+    df = pd.DataFrame.from_dict(statement, orient='index')
+    df.index.name = 'fiscal_date_ending'
+    return df
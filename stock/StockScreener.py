@@ -1,164 +1,128 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor, as_completed
+import threading
 import stock.EvalutateStock as es
 from stock.Stock import *
 import utils.CreateExcelFile as CreateExcelFile
 import database.DatabaseCRUD as db
 from utils.Constants import FILTERED_DIVIDEND_COMPANY_FILE_PATH
-from database.DatabaseConnection import db_connection
+from database.DatabaseConnection import ReadOnlyConnection
+from database.ColumnarPriceStore import get_price_store
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PriceEstimators.PriceEstimationCombined import get_price_estimation
+from PriceEstimators.BatchValuation import BatchValuation
+from stock.ScreeningCriteria import CriteriaPipeline, DEFAULT_CRITERIA
+
+# Every screening worker (thread or process) keeps its own read-only connection and screener
+_worker_state = threading.local()
+
+def _init_screening_worker(db_name=None):
+    # the columnar price store belongs to the default database
+    price_store = get_price_store() if db_name is None else None
+    _worker_state.db_crud = db.DatabaseCRUD(ReadOnlyConnection(db_name), price_store=price_store)
+    _worker_state.screener = StockScreener()
+
+def _screen_ticker_in_worker(ticker, db_name=None):
+    if getattr(_worker_state, 'db_crud', None) is None:
+        _init_screening_worker(db_name)
+    screener = _worker_state.screener
+    result = screener.screen_ticker(ticker, _worker_state.db_crud)
+    # None when the ticker was not evaluated (unknown ticker), same as in the sequential screening
+    return ticker, result, screener.outcomes.pop(ticker, None)
 
 class StockScreener:
-    def __init__(self):
+    def __init__(self, criteria=None):
         self.result = {}
+        # pass / skip / fail of every criterion that was run, per ticker
+        self.outcomes = {}
+        self.pipeline = CriteriaPipeline(DEFAULT_CRITERIA if criteria is None else criteria)
 
-    # TEST 1
-    # Market Capitalization > 2 billion
-    def check_market_cap(self, stock: Stock):
-        market_cap = stock.get_market_cap()
-        return float(market_cap) >= MIN_MARKET_CAP
-    
-    # TEST 2.1
-    # Current Ratio >= 2
-    def check_current_ratio(self, stock: Stock):
-        current_ratio = stock.get_current_ratio()
-        return float(current_ratio) >= MIN_CURRENT_RATIO
-
-    # TEST 2.2
-    # Long-Term Debt to Working Capital Ratio <= 1
-    def check_LTDebt_To_WC(self, stock: Stock):
-        LTDebtToWC = stock.get_LTDebt_to_WC()
-        return 0 < LTDebtToWC and LTDebtToWC <= MAX_LONG_TERM_DEBT_TO_WORKING_CAPITAL_RATIO
-
-    # TEST 3
     # Earnings stability - Positive net income for the past 10 years
     def check_earnings_stability(self, stock: Stock):
-        return stock.earnings_stability()
-    
-    # TEST 4
-    # Check if the stock has increased its dividend for more than 10 years in a row
-    def check_dividend_record(self, stock: Stock):
-        return stock.get_dividend_record_from_excel(FILTERED_DIVIDEND_COMPANY_FILE_PATH) >= INCREASED_DIVIDEND_RECORD
-
-    # TEST 5
-    # Check if the last 3 years earnings did grow more than 33% vs the earnings from the 8,9,10 year from the past
-    def check_earnings_growth(self, stock: Stock):
-        earnings_growth = stock.earnings_growth_last_10_years()
-        if earnings_growth < EARNINGS_GROWTH_THRESHOLD:
-            return False
-        return True
-    
-    # TEST 6
-    # Check if the stock has a P/E ratio between 0 and 15
-    def check_PE_ratio(self, stock: Stock):
-        pe_ratio = stock.compute_PE_ratio()
-        return 0 < pe_ratio and pe_ratio <= PE_RATIO_THRESHOLD
-    
-    # TEST 7
-    # Check if the stock has a price to book ratio between 0 and 1.5
-    def check_price_to_book_ratio(self, stock: Stock):
-        price_to_book_ratio = stock.compute_price_to_book_ratio()
-        return 0 < price_to_book_ratio and price_to_book_ratio <= PRICE_TO_BOOK_RATIO 
-
-    # TEST 8
-    # Check if the stock has a price to book ratio between 0 and 22.5 using Graham's formula
-    def check_price_to_book_ratio_graham(self, stock: Stock):
-        price_to_book_ratio_graham = stock.compute_price_to_book_ratio_graham()
-        return 0 < price_to_book_ratio_graham and price_to_book_ratio_graham <= PRICE_TO_BOOK_RATIO_GRAHAM
+        return stock.metric('earnings_stability')
 
     # Implement testing criterias
+    # The criteria run cheapest-first and stop at the first failure, the outcome of each one is kept in self.outcomes
     def validate_criterias(self, stock: Stock):
-        # Check Long-Term Debt to Working Capital
-        # long_term_debt_to_workin_capital = stock.get_LTDebt_to_WC()
-        # if long_term_debt_to_workin_capital == 0:
-        #     print(f"{stock.ticker} has no data available for the long-term debt to working capital ratio. Test skipped")
-        # elif self.check_LTDebt_To_WC(stock) == False:
-        #     print(f"-->{stock.ticker} failed the test 'Long-Term Debt to Working Capital'")
-        #     return False
-
-        # Check Current Ratio
-        if stock.get_sector() != "Utilities":
-            current_ratio = stock.get_current_ratio()
-            if current_ratio == 0:
-                print(f"{stock.ticker} has no data available for the current ratio. Test skipped")
-            elif self.check_current_ratio(stock) == False:
-                print(f"-->{stock.ticker} failed the test 'Current Ratio'")
-                return False
-        else:
-            print(f"{stock.ticker} is a utility company. Current ratio test skipped")
-
-        # Check Market Cap
-        market_cap = stock.get_market_cap()
-        if market_cap == 0:
-            print(f"{stock.ticker} has no data available for the market capitalization. Test skipped")
-        elif self.check_market_cap(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'Market Cap'")
-            return False
+        passed, outcomes = self.pipeline.run(stock)
+        self.outcomes[stock.ticker] = outcomes
+        if passed:
+            print(f"{stock.ticker} passed all tests")
+        return passed
+
+    # Screen a single ticker
+    def screen_ticker(self, ticker, db_crud=None):
+        try:
+            print(f"Screening {ticker}...")
+            stock = Stock(ticker, db_crud)
+            company_id = stock.snapshot.company_id
+            print(f"Company ID for {ticker}: {company_id}")
 
-        # Check P/E Ratio
-        pe_ratio = stock.compute_PE_ratio()
-        if pe_ratio == 0:
-            print(f"{stock.ticker} has no data available for the P/E ratio. Test skipped")
-        elif self.check_PE_ratio(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'P/E Ratio'")
-            return False
+            if company_id is None:
+                print(f"No data found for ticker '{ticker}'. Skipping.")
+                return False
 
-        # Check Price_To_Book_Ratio normal and using Graham's formula
-        price_to_book_ratio = stock.compute_price_to_book_ratio()
-        price_to_book_ratio_graham = stock.compute_price_to_book_ratio_graham()
-        if price_to_book_ratio == 0 and price_to_book_ratio_graham == 0:
-            print(f"{stock.ticker} has no data available for the price-to-book ratio (normal and graham). Test skipped")
-        elif self.check_price_to_book_ratio(stock) == False and self.check_price_to_book_ratio_graham(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'Price-to-book ratio' and 'Graham's price-to-book ratio'")
-            return False
-        
-        # # Check Dividend Record
-        if self.check_dividend_record(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'Dividend Record'")
+            return self.validate_criterias(stock)
+        except Exception as e:
+            print(f"Error screening {ticker}: {e}")
             return False
 
-        # Check Earnings Stability
-        earnings_stability = self.check_earnings_stability(stock)
-        if earnings_stability == 0:
-            print(f"{stock.ticker} has no data available to check the earnings stability. Test skipped")
-        elif self.check_earnings_stability(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'Earnings Stability'")
-            return False
+    # Screen a list of stocks
+    # max_workers=1 screens in sequence, otherwise the tickers are spread over a pool of
+    # threads or processes (engine="thread" / "process"), each with its own read-only connection
+    # max_workers=None uses one worker per CPU core
+    def screen_stocks(self, tickers, max_workers=1, engine="process", db_name=None):
+        if max_workers == 1:
+            results = {ticker: self.screen_ticker(ticker) for ticker in tickers}
+        else:
+            results = self.screen_stocks_parallel(tickers, max_workers, engine, db_name)
 
-        # Check Earnings Growth
-        if self.check_earnings_growth(stock) == False:
-            print(f"-->{stock.ticker} failed the test 'Earnings Growth'")
-            return False
+        self.result = results
+        print("\nScreening done.\n")
+        return results
 
-        # All tests passed
-        print(f"{stock.ticker} passed all tests")
-        return True
+    def screen_stocks_parallel(self, tickers, max_workers=None, engine="process", db_name=None):
+        if engine == "process":
+            executor_class = ProcessPoolExecutor
+        elif engine == "thread":
+            executor_class = ThreadPoolExecutor
+        else:
+            raise ValueError(f"Unknown screening engine '{engine}'. Use 'thread' or 'process'.")
 
-    # Screen a list of stocks in sequence without multi threading
-    def screen_stocks(self, tickers):
         results = {}
-        for ticker in tickers:
-            try:
-                print(f"Screening {ticker}...")
-                stock = Stock(ticker)
-                company_id = stock.db_crud.select_company(ticker)
-                print(f"Company ID for {ticker}: {company_id}")
-                
-                if company_id is None:
-                    print(f"No data found for ticker '{ticker}'. Skipping.")
-                    results[ticker] = False
-                    continue
-
-                result = self.validate_criterias(stock)
+        with executor_class(max_workers=max_workers, initializer=_init_screening_worker, initargs=(db_name,)) as executor:
+            futures = {executor.submit(_screen_ticker_in_worker, ticker, db_name): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    _, result, outcomes = future.result()
+                    if outcomes is not None:
+                        self.outcomes[ticker] = outcomes
+                except BrokenExecutor:
+                    # the workers died (e.g. at start-up), the remaining tickers cannot be screened
+                    raise
+                except Exception as e:
+                    print(f"Error screening {ticker}: {e}")
+                    result = False
                 results[ticker] = result
-            except Exception as e:
-                print(f"Error screening {ticker}: {e}")
-                results[ticker] = False
-        
-        self.result = results
-        print("\nScreening done.\n")
-        return results
+
+        # Merge the results in the order of the input tickers, independent of completion order
+        self.outcomes = {ticker: self.outcomes[ticker] for ticker in tickers if ticker in self.outcomes}
+        return {ticker: results[ticker] for ticker in tickers}
+
+    # Export the pass / skip / fail outcome of every criterion recorded during screening, without re-running anything
+    def export_criteria_outcomes_to_excel_file(self, file_name):
+        print(f"Exporting criteria outcomes to {file_name}...")
+        if not self.result:
+            print("No results to export. Ensure the screening process was completed successfully.")
+            return
+        columns = ['Ticker', 'Passed'] + self.pipeline.names
+        excel = CreateExcelFile.ExcelFile(file_name, columns)
+        for ticker, passed in self.result.items():
+            row = {'Ticker': ticker, 'Passed': passed}
+            row.update(self.outcomes.get(ticker, {}))
+            excel.add_stocks(row)
+        excel.save()
 
     # Export results to an Excel file
     def export_results_to_excel_file(self, file_name):
@@ -177,19 +141,22 @@ class StockScreener:
 
             stock_data_list = []
 
-            for ticker in self.result:
-                if self.result[ticker]:
-                    try:
-                        print(f"Processing {ticker}...")
-                        stock = Stock(ticker)
-                        data = self.stock_data(stock)
-                        if data is not None:
-                            print(f"Data for {ticker} processed successfully.")
-                            stock_data_list.append(data)
-                        else:
-                            print(f"No data for {ticker}.")
-                    except Exception as e:
-                        print(f"Error processing {ticker}: {e}")
+            # the estimated prices of all the passing stocks are computed together, with a few bulk queries
+            passed = [ticker for ticker in self.result if self.result[ticker]]
+            estimates = BatchValuation().estimate(passed)
+
+            for ticker in passed:
+                try:
+                    print(f"Processing {ticker}...")
+                    stock = Stock(ticker)
+                    data = self.stock_data(stock, estimates.loc[ticker, 'average'])
+                    if data is not None:
+                        print(f"Data for {ticker} processed successfully.")
+                        stock_data_list.append(data)
+                    else:
+                        print(f"No data for {ticker}.")
+                except Exception as e:
+                    print(f"Error processing {ticker}: {e}")
 
             for stock_data in stock_data_list:
                 excel.add_stocks(stock_data)
@@ -199,7 +166,8 @@ class StockScreener:
             print(f"Error occured during export: {e}")
 
     
-    def stock_data(self,ticker: Stock):
+    # estimated_price - average of the multiple-based estimations, computed with get_price_estimation if None
+    def stock_data(self,ticker: Stock, estimated_price=None):
         data = {}
         evaluator = es.evaluateStock(ticker, FILTERED_DIVIDEND_COMPANY_FILE_PATH)
         try:
@@ -207,13 +175,15 @@ class StockScreener:
             sector = ticker.db_crud.select_company_sector(ticker.ticker)
             data["Sector"] = sector
             data["Price"] = f"{ticker.db_crud.get_last_price(ticker.ticker):.2f}$"
-            data["Estimated Price"] = f"{get_price_estimation(ticker.ticker):.2f}$"
-            data['Market Cap'] = f"{ticker.get_market_cap()/BILLION_DIVISION:.2f}B"
-            data['Current Ratio'] = f"{ticker.get_current_ratio():.2f}"
-            data['LTDebtToWC'] = f"{ticker.get_LTDebt_to_WC():.2f}"
+            if estimated_price is None:
+                estimated_price = get_price_estimation(ticker)
+            data["Estimated Price"] = f"{estimated_price:.2f}$"
+            data['Market Cap'] = f"{ticker.metric('get_market_cap')/BILLION_DIVISION:.2f}B"
+            data['Current Ratio'] = f"{ticker.metric('get_current_ratio'):.2f}"
+            data['LTDebtToWC'] = f"{ticker.metric('get_LTDebt_to_WC'):.2f}"
             data['Earnings Stability'] = self.check_earnings_stability(ticker)
-            data['Earnings Growth 10Y'] = f"{ticker.earnings_growth_last_10_years():.2f}"
-            data['Dividend Record'] = ticker.get_dividend_record_from_excel(FILTERED_DIVIDEND_COMPANY_FILE_PATH)
+            data['Earnings Growth 10Y'] = f"{ticker.metric('earnings_growth_last_10_years'):.2f}"
+            data['Dividend Record'] = ticker.metric('get_dividend_record_from_excel', FILTERED_DIVIDEND_COMPANY_FILE_PATH)
             data["Dividend Yield"] = f"{ticker.get_dividend_yield() * 100:.2f}%"
             data["DGR 3Y"] = f"{ticker.get_DGR_3Y_from_excel(FILTERED_DIVIDEND_COMPANY_FILE_PATH)}%"
             data["DGR 5Y"] = f"{ticker.get_DGR_5Y_from_excel(FILTERED_DIVIDEND_COMPANY_FILE_PATH)}%"
@@ -230,9 +200,9 @@ class StockScreener:
             data["ROCE"] = f"{ticker.compute_ROCE() * 100:.2f}%"
             data["ROE"] = f"{ticker.return_on_equity() * 100:.2f}%"
             data["Ordinary Share Number Trend"] = ticker.ordinary_shares_number_trend_analysis()
-            data['P/E Ratio'] = f"{ticker.compute_PE_ratio():.2f}"
-            data['Price-to-book ratio'] = f"{ticker.compute_price_to_book_ratio():.2f}"
-            data["Graham's price-to-book ratio"] = f"{ticker.compute_price_to_book_ratio_graham():.2f}"
+            data['P/E Ratio'] = f"{ticker.metric('compute_PE_ratio'):.2f}"
+            data['Price-to-book ratio'] = f"{ticker.metric('compute_price_to_book_ratio'):.2f}"
+            data["Graham's price-to-book ratio"] = f"{ticker.metric('compute_price_to_book_ratio_graham'):.2f}"
             data["Points"] = evaluator.give_points()
         except Exception as e:
             print(f"Error getting data for {ticker.ticker}: {e}")
@@ -12,9 +12,22 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from stock.Stock import Stock
 from utils.Constants import FILTERED_DIVIDEND_COMPANY_FILE_PATH
 from services.db_instance import get_db
-from services.financial_data_processor import get_income_statement_df, get_balance_sheet_df, get_cashflow_statement_df
+from services.financial_data_processor import get_financial_statements_dfs
 from datetime import datetime
 
+# statement_type -> cheia din session_state unde este păstrat DataFrame-ul
+STATEMENT_SESSION_KEYS = {
+    "income_statement": "income_statement_df",
+    "balance_sheet": "balance_sheet_df",
+    "cash_flow_statement": "cash_flow_statement_df",
+}
+
+# Încarcă toate cele trei situații financiare dintr-o singură interogare
+def load_financial_statements(ticker, start_year, end_year):
+    statements = get_financial_statements_dfs(ticker, start_year, end_year) or {}
+    for statement_type, key in STATEMENT_SESSION_KEYS.items():
+        st.session_state[key] = statements.get(statement_type)
+
 def get_valid_defaults(defaults, available_columns):
     return [col for col in defaults if col in available_columns]
 
@@ -50,8 +63,9 @@ if st.button("Search") and selected_ticker:
             # Verifică dacă s-a schimbat ticker-ul
             if "company_ticker" in st.session_state and st.session_state.company_ticker != selected_ticker:
                 # Resetează datele financiare dacă s-a schimbat ticker-ul
-                if "income_statement_df" in st.session_state:
-                    del st.session_state.income_statement_df
+                for key in STATEMENT_SESSION_KEYS.values():
+                    if key in st.session_state:
+                        del st.session_state[key]
                 if "show_financial_data" in st.session_state:
                     st.session_state.show_financial_data = False
 
@@ -94,12 +108,7 @@ if st.session_state.company_found:
         if statement == 'Income Statement':
             # Verifică dacă există date pentru ticker-ul curent sau dacă trebuie reîncărcate
             if "income_statement_df" not in st.session_state:
-                df = get_income_statement_df(st.session_state.company_ticker, 2009, current_year)
-                if df is not None:
-                    st.session_state.income_statement_df = df
-                else:
-                    st.warning("No financial data available")
-                    st.session_state.income_statement_df = None
+                load_financial_statements(st.session_state.company_ticker, 2009, current_year)
 
             # Dacă datele sunt disponibile, continuăm
             if st.session_state.income_statement_df is not None:
@@ -157,12 +166,7 @@ if st.session_state.company_found:
         elif statement == "Balance Sheet":
              # Verifică dacă există date pentru ticker-ul curent sau dacă trebuie reîncărcate
             if "balance_sheet_df" not in st.session_state:
-                df = get_balance_sheet_df(st.session_state.company_ticker, 2009, current_year)
-                if df is not None:
-                    st.session_state.balance_sheet_df = df
-                else:
-                    st.warning("No financial data available")
-                    st.session_state.balance_sheet_df = None
+                load_financial_statements(st.session_state.company_ticker, 2009, current_year)
         
             # Dacă datele sunt disponibile, continuăm
             if st.session_state.balance_sheet_df is not None:
@@ -220,12 +224,7 @@ if st.session_state.company_found:
         elif statement == "Cashflow Statement":
             # Verifică dacă există date pentru ticker-ul curent sau dacă trebuie reîncărcate
             if "cash_flow_statement_df" not in st.session_state:
-                df = get_cashflow_statement_df(st.session_state.company_ticker, 2009, current_year)
-                if df is not None:
-                    st.session_state.cash_flow_statement_df = df
-                else:
-                    st.warning("No financial data available")
-                    st.session_state.cash_flow_statement_df = None
+                load_financial_statements(st.session_state.company_ticker, 2009, current_year)
         
             # Dacă datele sunt disponibile, continuăm
             if st.session_state.cash_flow_statement_df is not None:
@@ -5,159 +5,100 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from services.db_instance import get_db
+import numpy as np
 import pandas as pd
 from financial_analysis import financial_metrics
 
 db_crud = get_db()
 
-def get_income_statement_df(ticker, start_year, end_year):
-    company_id = db_crud.select_company(ticker)
-    if company_id is None:
-        return None
-
-    record_types = [
-        "revenue", "grossProfit", "COGS", "researchAndDevelopment", 
-        "depreciationAndAmortization", "incomeBeforeTax", 
-        "ebit", "netIncome", "interestExpense"
-    ]
-
-    raw_data = db_crud.select_financial_data_by_year_range(
-        company_id, "income_statement", start_year, end_year, record_types
-    )
-
-    if not raw_data:
+BILLION = 1_000_000_000
+
+# record_type -> column shown on the Overview page, for every statement
+INCOME_STATEMENT_COLUMNS = {
+    "revenue": "Revenue",
+    "grossProfit": "Gross Profit",
+    "COGS": "COGS",
+    "researchAndDevelopment": "R&D",
+    "depreciationAndAmortization": "D&A",
+    "incomeBeforeTax": "Income Before Tax",
+    "ebit": "Ebit",
+    "netIncome": "Net Income",
+    "interestExpense": "Interest Expense"
+}
+
+BALANCE_SHEET_COLUMNS = {
+    "totalAssets": "Total Assets",
+    "totalCurrentAssets": "Total Current Assets",
+    "inventory": "Inventory",
+    "propertyPlantEquipment": "Property Plant Equipment",
+    "intagibleAssets": "Intangible Assets",
+    "goodwill": "Goodwill",
+    "totalLiabilities": "Total Liabilities",
+    "totalCurrentLiabilities": "Total Current Liabilities",
+    "currentAccountsPayable": "Current Accounts Payable",
+    "currentDebt": "Current Debt",
+    "shortTermDebt": "Short Term Debt",
+    "capitalLeaseObligations": "Capital Lease Obligation",
+    "longTermDebt": "Long Term Debt",
+    "totalEquity": "Total Equity",
+    "treasuryStock": "Treasury Stock",
+    "commonStock": "Common Stock",
+    "sharesOutstanding": "Shares Outstanding"
+}
+
+CASH_FLOW_STATEMENT_COLUMNS = {
+    "operatingCashFlow": "Operating Cash Flow",
+    "cashFlowInvesting": "Investing Cash Flow",
+    "cashFlowFinancing": "Financing Cash Flow",
+    "capitalExpenditures": "CAPEX",
+    "dividendPayout": "Dividend Payout",
+    "dividendPayoutPreferredStock": "Dividend Preferred Stock Payout"
+}
+
+STATEMENT_COLUMNS = {
+    "income_statement": INCOME_STATEMENT_COLUMNS,
+    "balance_sheet": BALANCE_SHEET_COLUMNS,
+    "cash_flow_statement": CASH_FLOW_STATEMENT_COLUMNS,
+}
+
+# Values in billions rounded to 2 decimals, newest year first; None if there is no data
+def _format_statement_df(df, column_mapping):
+    if df is None or df.empty:
         return None
+    values = np.round(df[list(column_mapping)].to_numpy() / BILLION, 2)
+    order = np.argsort(df.index.to_numpy())[::-1]
+    return pd.DataFrame(values[order], index=pd.Index(df.index.to_numpy()[order], name="Year"),
+                        columns=list(column_mapping.values()))
 
-    df = pd.DataFrame.from_dict(raw_data, orient="index")
-    df.index.name = "Year"
-    df.sort_index(inplace=True)
-
-    df = df.map(lambda x: round(int(x) / 1_000_000_000, 2) if x not in [None, "None"] else None)
-
-    column_mapping = {
-        "revenue": "Revenue",
-        "grossProfit": "Gross Profit",
-        "COGS": "COGS",
-        "researchAndDevelopment": "R&D",
-        "depreciationAndAmortization": "D&A",
-        "incomeBeforeTax": "Income Before Tax",
-        "ebit": "Ebit",
-        "netIncome": "Net Income",
-        "interestExpense": "Interest Expense"
-    }
-    df.rename(columns=column_mapping, inplace=True)
-
-    for col in column_mapping.values():
-        if col not in df.columns:
-            df[col] = None
-
-    df = df[list(column_mapping.values())]
-
-    df.sort_index(ascending=False, inplace=True)
-
-    return df
-
-
-def get_balance_sheet_df(ticker, start_year, end_year):
+# statement_type -> formatted DataFrame (or None) of the requested statements, read with a single query
+def get_financial_statements_dfs(ticker, start_year, end_year, statement_types=tuple(STATEMENT_COLUMNS)):
     company_id = db_crud.select_company(ticker)
     if company_id is None:
         return None
 
-    record_types = [
-        "totalAssets", "totalCurrentAssets", "inventory", 
-        "propertyPlantEquipment", "intagibleAssets", 
-        "goodwill", "totalLiabilities", "totalCurrentLiabilities",
-        "currentAccountsPayable", "currentDebt", "shortTermDebt", "capitalLeaseObligations", "longTermDebt", 
-        "totalEquity", "treasuryStock", "commonStock", "sharesOutstanding"
-    ]
-
-    raw_data = db_crud.select_financial_data_by_year_range(
-        company_id, "balance_sheet", start_year, end_year, record_types
+    statements = db_crud.select_statements_by_year_range(
+        company_id, start_year, end_year,
+        {statement_type: list(STATEMENT_COLUMNS[statement_type]) for statement_type in statement_types}
     )
-
-    if not raw_data:
-        return None
-
-    df = pd.DataFrame.from_dict(raw_data, orient="index")
-    df.index.name = "Year"
-    df.sort_index(inplace=True)
-
-    df = df.map(lambda x: round(int(x) / 1_000_000_000, 2) if x not in [None, "None"] else None)
-
-    column_mapping = {
-        "totalAssets": "Total Assets",
-        "totalCurrentAssets": "Total Current Assets",
-        "inventory": "Inventory",
-        "propertyPlantEquipment": "Property Plant Equipment",
-        "intagibleAssets": "Intangible Assets",
-        "goodwill": "Goodwill",
-        "totalLiabilities": "Total Liabilities",
-        "totalCurrentLiabilities": "Total Current Liabilities",
-        "currentAccountsPayable": "Current Accounts Payable",
-        "currentDebt": "Current Debt",
-        "shortTermDebt": "Short Term Debt",
-        "capitalLeaseObligations": "Capital Lease Obligation",
-        "longTermDebt": "Long Term Debt",
-        "totalEquity": "Total Equity",
-        "treasuryStock": "Treasury Stock",
-        "commonStock": "Common Stock",
-        "sharesOutstanding": "Shares Outstanding"
+    return {
+        statement_type: _format_statement_df(df, STATEMENT_COLUMNS[statement_type])
+        for statement_type, df in statements.items()
     }
-    df.rename(columns=column_mapping, inplace=True)
 
-    for col in column_mapping.values():
-        if col not in df.columns:
-            df[col] = None
-
-    df = df[list(column_mapping.values())]
-
-    df.sort_index(ascending=False, inplace=True)
-
-    return df
-
-def get_cashflow_statement_df(ticker, start_year, end_year):
-    company_id = db_crud.select_company(ticker)
-    if company_id is None:
-        return None
-
-    record_types = [
-        "operatingCashFlow", "capitalExpenditures", "cashFlowInvesting", 
-        "cashFlowFinancing", "dividendPayout", 
-        "dividendPayoutPreferredStock", "changeInOperatingAssets", "changeInOperatingLiabilities"
-    ]
-
-    raw_data = db_crud.select_financial_data_by_year_range(
-        company_id, "cash_flow_statement", start_year, end_year, record_types
-    )
-
-    if not raw_data:
+def _get_statement_df(ticker, statement_type, start_year, end_year):
+    statements = get_financial_statements_dfs(ticker, start_year, end_year, (statement_type,))
+    if statements is None:
         return None
+    return statements[statement_type]
 
-    df = pd.DataFrame.from_dict(raw_data, orient="index")
-    df.index.name = "Year"
-    df.sort_index(inplace=True)
-
-    df = df.map(lambda x: round(int(x) / 1_000_000_000, 2) if x not in [None, "None"] else None)
-
-    column_mapping = {
-        "operatingCashFlow": "Operating Cash Flow",
-        "cashFlowInvesting": "Investing Cash Flow",
-        "cashFlowFinancing": "Financing Cash Flow",
-        "capitalExpenditures": "CAPEX",
-        "dividendPayout": "Dividend Payout",
-        "dividendPayoutPreferredStock": "Dividend Preferred Stock Payout"
-    }
-    df.rename(columns=column_mapping, inplace=True)
-
-    for col in column_mapping.values():
-        if col not in df.columns:
-            df[col] = None
-
-    df = df[list(column_mapping.values())]
+def get_income_statement_df(ticker, start_year, end_year):
+    return _get_statement_df(ticker, "income_statement", start_year, end_year)
 
-    df.sort_index(ascending=False, inplace=True)
+def get_balance_sheet_df(ticker, start_year, end_year):
+    return _get_statement_df(ticker, "balance_sheet", start_year, end_year)
 
-    return df
+def get_cashflow_statement_df(ticker, start_year, end_year):
+    return _get_statement_df(ticker, "cash_flow_statement", start_year, end_year)
 
 def get_financial_ratios_df(ticker, start_year=2013, end_year=2023):
     try:
@@ -0,0 +1,108 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from database.DatabaseConnection import DatabaseConnection, close_db_connection
+from database.DatabaseCRUD import DatabaseCRUD
+from database.ColumnarPriceStore import ColumnarPriceStore
+
+class ColumnarPriceStoreTest(unittest.TestCase):
+    def setUp(self):
+        close_db_connection()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.connection = DatabaseConnection(os.path.join(self.tmp_dir, "test.db"))
+        self.store = ColumnarPriceStore(os.path.join(self.tmp_dir, "price_store"))
+        self.db_crud = DatabaseCRUD(self.connection, price_store=self.store)
+        for ticker in ("AAA", "BBB"):
+            self.db_crud.insert_company(ticker, "Industrials")
+        # BBB has no price on 2020-01-03
+        prices = pd.DataFrame({"AAA": [10.0, 11.0, 12.0], "BBB": [20.0, np.nan, 22.0]},
+                              index=pd.Index(["2020-01-02", "2020-01-03", "2020-01-06"], name="Date"))
+        # the bulk insert syncs the store
+        self.db_crud.bulk_insert_prices(prices)
+
+    def tearDown(self):
+        self.store = None
+        self.db_crud = None
+        self.connection.close_connection()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def assert_served(self, served=True):
+        self.assertEqual(self.db_crud._store_serves(["AAA", "BBB"]), served)
+
+    def test_sync_exports_every_price(self):
+        self.assert_served()
+        dates, closes = self.db_crud.get_prices("BBB", "2020-01-01", "2020-12-31", as_array=True)
+        # a view over the memory-mapped file, with NaN on the date without a price
+        self.assertIsInstance(closes, np.memmap)
+        self.assertEqual(list(np.datetime_as_string(dates)), ["2020-01-02", "2020-01-03", "2020-01-06"])
+        np.testing.assert_array_equal(closes, [20.0, np.nan, 22.0])
+        self.assertEqual(self.db_crud.get_last_price("AAA"), 12.0)
+        self.assertIsNone(self.db_crud.get_price("BBB", "2020-01-03"))
+        self.assertEqual(self.db_crud.get_last_prices(["AAA", "bbb"]), {"AAA": 12.0, "BBB": 22.0})
+
+    def test_changes_are_tracked_until_the_next_sync(self):
+        self.db_crud.insert_price("AAA", "2020-01-07", 13.0)
+        self.assert_served(False)
+        self.store.sync(self.connection)
+        self.assert_served()
+        self.assertEqual(self.db_crud.get_last_price("AAA"), 13.0)
+
+        self.db_crud.update_price("BBB", "2020-01-02", 19.0)
+        self.db_crud.delete_price("AAA", "2020-01-03")
+        self.assert_served(False)
+        self.assertGreater(self.store.sync(self.connection), 0)
+        self.assert_served()
+        self.assertEqual(self.db_crud.get_price("BBB", "2020-01-02"), 19.0)
+        self.assertIsNone(self.db_crud.get_price("AAA", "2020-01-03"))
+
+    def test_a_date_inside_the_calendar_starts_a_new_generation(self):
+        generation = self.store._read_manifest()["generation"]
+        self.db_crud.bulk_insert_prices(pd.DataFrame({"BBB": [21.0]}, index=pd.Index(["2020-01-03"], name="Date")))
+        self.assertEqual(self.store._read_manifest()["generation"], generation)
+        self.db_crud.bulk_insert_prices(pd.DataFrame({"AAA": [9.0]}, index=pd.Index(["2019-12-31"], name="Date")))
+        self.assertEqual(self.store._read_manifest()["generation"], generation + 1)
+        self.assert_served()
+        _, closes = self.db_crud.get_prices("AAA", "2019-01-01", "2020-12-31", as_array=True)
+        np.testing.assert_array_equal(closes, [9.0, 10.0, 11.0, 12.0])
+        _, closes = self.db_crud.get_prices("BBB", "2020-01-01", "2020-12-31", as_array=True)
+        np.testing.assert_array_equal(closes, [20.0, 21.0, 22.0])
+
+    def test_reads_fall_back_to_the_table(self):
+        self.db_crud.update_price("AAA", "2020-01-06", 15.0)
+        self.assertEqual(self.db_crud.get_last_price("AAA"), 15.0)
+        # read from the table: only the dates with a price
+        dates, closes = self.db_crud.get_prices("BBB", "2020-01-01", "2020-12-31", as_array=True)
+        self.assertNotIsInstance(closes, np.memmap)
+        self.assertEqual(list(np.datetime_as_string(dates)), ["2020-01-02", "2020-01-06"])
+
+        # a ticker the store does not have yet
+        self.db_crud.insert_company("CCC", "Utilities")
+        self.store.sync(self.connection)
+        self.assertFalse(self.db_crud._store_serves(["AAA", "CCC"]))
+        self.assertEqual(self.db_crud.get_last_prices(["AAA", "CCC"]), {"AAA": 15.0})
+
+        # a store that was never synced
+        self.db_crud.price_store = ColumnarPriceStore(os.path.join(self.tmp_dir, "empty_store"))
+        self.assert_served(False)
+        self.assertEqual(self.db_crud.get_price("AAA", "2020-01-06"), 15.0)
+
+    def test_is_synced_queries_only_after_a_change(self):
+        statements = []
+        self.connection.connection.set_trace_callback(statements.append)
+        for _ in range(3):
+            self.assert_served()
+        self.assertEqual(sum("MAX(id)" in statement for statement in statements), 1)
+
+        self.db_crud.insert_price("BBB", "2020-01-07", 23.0)
+        self.assert_served(False)
+        self.store.sync(self.connection)
+        self.assert_served()
+        self.assertEqual(sum("MAX(id)" in statement for statement in statements), 3)
+
+if __name__ == "__main__":
+    unittest.main()
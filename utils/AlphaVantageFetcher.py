@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+import aiohttp
+from utils.Constants import (ALPHA_VANTAGE_API_KEY1, ALPHA_VANTAGE_BASE_URL,
+                             ALPHA_VANTAGE_REQUESTS_PER_MINUTE, ALPHA_VANTAGE_MAX_CONCURRENT_REQUESTS)
+from stock.StatementParser import STATEMENT_FUNCTIONS, parse_statement
+from utils.ApiResponseCache import ApiResponseCache
+
+# HTTP statuses worth retrying, anything else is a permanent error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Rate limiter shared by all the requests of a fetcher: `rate` tokens are added
+    every second, up to `capacity`, and every request consumes one token.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AlphaVantageFetcher:
+    """
+    Fetches the annual statements of many tickers concurrently.
+
+    All the requests go through one pooled aiohttp session and one token bucket,
+    so a full refresh is limited only by the requests_per_minute quota of the key.
+    Throttled or failed requests are retried with exponential backoff.
+    base_url can point to a local stub server for testing.
+
+    Valid responses are stored in the ApiResponseCache and served from it until they expire.
+    With offline=True only the cache is used, whatever the age of the responses, so the stored
+    statements can be reprocessed without spending API quota.
+    """
+    def __init__(self, api_key=ALPHA_VANTAGE_API_KEY1, requests_per_minute=ALPHA_VANTAGE_REQUESTS_PER_MINUTE,
+                 max_concurrent_requests=ALPHA_VANTAGE_MAX_CONCURRENT_REQUESTS, max_retries=3,
+                 backoff_seconds=1.0, timeout_seconds=30, base_url=ALPHA_VANTAGE_BASE_URL,
+                 cache=None, offline=False):
+        self.api_key = api_key
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.base_url = base_url
+        self.cache = cache if cache is not None else ApiResponseCache()
+        self.offline = offline
+
+    # Sync entry point: {ticker: DataFrame or None} for one statement type
+    def fetch_statements(self, tickers, statement_type):
+        return asyncio.run(self.fetch_statements_async(tickers, statement_type))
+
+    async def fetch_statements_async(self, tickers, statement_type):
+        bucket = TokenBucket(self.requests_per_minute / 60)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent_requests)
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            statements = await asyncio.gather(
+                *(self._fetch_statement(session, bucket, ticker, statement_type) for ticker in tickers)
+            )
+        return dict(zip(tickers, statements))
+
+    async def _fetch_statement(self, session, bucket, ticker, statement_type):
+        function = STATEMENT_FUNCTIONS[statement_type]
+        data = self.cache.get(function, ticker, ignore_ttl=self.offline)
+        if data is None and not self.offline:
+            data = await self._fetch_json(session, bucket, function, ticker)
+        if data is None:
+            return None
+        try:
+            return parse_statement(statement_type, data)
+        except Exception as e:
+            print(f"Error parsing {statement_type} for {ticker}: {e}")
+            return None
+
+    # Returns the JSON payload, or None if the request failed after all the retries
+    async def _fetch_json(self, session, bucket, function, ticker):
+        params = {'function': function, 'symbol': ticker, 'apikey': self.api_key}
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            try:
+                async with session.get(self.base_url, params=params) as response:
+                    if response.status in RETRY_STATUSES:
+                        reason = f"HTTP {response.status}"
+                    elif response.status != 200:
+                        print(f"Error getting {function} for {ticker}: HTTP {response.status}")
+                        return None
+                    else:
+                        body = await response.read()
+                        data = json.loads(body)
+                        if 'Error Message' in data:
+                            print(f"Error getting {function} for {ticker}: {data['Error Message']}")
+                            return None
+                        # the API answers a throttled request with 200 and a 'Note'/'Information' message
+                        if 'Note' not in data and 'Information' not in data:
+                            if 'annualReports' in data:
+                                self.cache.put(function, ticker, body)
+                            return data
+                        reason = data.get('Note') or data.get('Information')
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                reason = repr(e)
+
+            if attempt < self.max_retries:
+                delay = self.backoff_seconds * 2 ** attempt
+                print(f"Retrying {function} for {ticker} in {delay}s ({reason})")
+                await asyncio.sleep(delay)
+            else:
+                print(f"Error getting {function} for {ticker} after {self.max_retries + 1} attempts: {reason}")
+        return None
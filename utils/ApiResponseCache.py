@@ -0,0 +1,64 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+from utils.Constants import API_CACHE_DIR, API_CACHE_TTL_DAYS
+
+class ApiResponseCache:
+    """
+    Local cache of the raw API responses.
+
+    blobs/<sha256>.json.gz       - the gzip-compressed response body, named by the hash of its content,
+                                   so identical responses are stored only once
+    refs/<function>/<symbol>.json - the hash of the last response received for (function, symbol)
+                                   and the time when it was fetched
+
+    A ref older than ttl_days is expired, unless the caller asks for it with ignore_ttl=True
+    (e.g. to reprocess the stored statements without calling the API).
+    """
+    def __init__(self, cache_dir=API_CACHE_DIR, ttl_days=API_CACHE_TTL_DAYS):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, "blobs", digest[:2], f"{digest}.json.gz")
+
+    def _ref_path(self, function, symbol):
+        return os.path.join(self.cache_dir, "refs", function.upper(), f"{symbol.upper()}.json")
+
+    # Returns the decoded JSON stored for (function, symbol) or None if it is missing or expired
+    def get(self, function, symbol, ignore_ttl=False):
+        try:
+            with open(self._ref_path(function, symbol), "r") as f:
+                ref = json.load(f)
+            if not ignore_ttl and time.time() - ref["fetched_at"] > self.ttl_seconds:
+                return None
+            with gzip.open(self._blob_path(ref["sha256"]), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # Store the raw response body (bytes or str) and point (function, symbol) to it
+    def put(self, function, symbol, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        try:
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                self._write_atomic(blob_path, gzip.compress(body))
+            ref = {"sha256": digest, "fetched_at": time.time()}
+            self._write_atomic(self._ref_path(function, symbol), json.dumps(ref).encode("utf-8"))
+            return digest
+        except OSError as e:
+            print(f"Error caching {function} for {symbol}: {e}")
+            return None
+
+    # Write to a temporary file first so a concurrent reader never sees a partial file
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -37,8 +37,19 @@ creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPE
 client = gspread.authorize(creds)
 
 ALPHA_VANTAGE_API_KEY1 = os.getenv("ALPHA_VANTAGE_API_KEY1")
+ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
+ALPHA_VANTAGE_REQUESTS_PER_MINUTE = 75 # quota of the API key (free keys allow 5)
+ALPHA_VANTAGE_MAX_CONCURRENT_REQUESTS = 8
 
 DB_NAME = "companies.db"
+DB_MAX_READERS = 8 # read-only connections of the connection pool
+# PRAGMAs applied to every connection; with WAL, synchronous=NORMAL syncs at the checkpoints instead of every commit
+DB_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -64000, # KiB (64 MB)
+    "mmap_size": 268435456, # 256 MB
+    "temp_store": "MEMORY",
+}
 
 # Get the directory of the current script (Constants.py)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -60,3 +71,8 @@ PRICE_DAILY_FILE_PATH = os.path.join(OUTDATA_DIR, "PriceDaily.csv")
 CLEANED_PRICE_DAILY_FILE_PATH = os.path.join(OUTDATA_DIR, "CleanedPriceDaily.csv")
 FILLED_DAILY_PRICE_FILE_PATH = os.path.join(OUTDATA_DIR, "FilledPriceDaily.csv")
 
+API_CACHE_DIR = os.path.join(OUTDATA_DIR, "api_cache")
+API_CACHE_TTL_DAYS = 30
+PRICE_STORE_DIR = os.path.join(OUTDATA_DIR, "price_store")
+USE_PRICE_STORE = True # the price reads of the default database are served from the columnar copy in PRICE_STORE_DIR while it is in sync
+
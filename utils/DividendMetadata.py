@@ -0,0 +1,39 @@
+import os
+import threading
+import pandas as pd
+from utils.Constants import FILTERED_DIVIDEND_COMPANY_FILE_PATH
+
+# Process-wide index of the dividend CSV files: file path -> (mtime, {Symbol: {column: value}})
+_index_cache = {}
+_index_lock = threading.Lock()
+
+def get_dividend_metadata(file_path=FILTERED_DIVIDEND_COMPANY_FILE_PATH):
+    """
+    Returns the dividend CSV indexed by Symbol. The file is parsed only once and
+    parsed again only when its modification time changes.
+    Returns None if the file does not exist.
+    """
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _index_lock:
+        cached = _index_cache.get(file_path)
+        if cached is None or cached[0] != mtime:
+            df = pd.read_csv(file_path)
+            # keep the first row of a duplicated symbol, like the previous boolean-mask lookup did
+            df = df.drop_duplicates(subset='Symbol', keep='first').set_index('Symbol')
+            cached = (mtime, df.to_dict('index'))
+            _index_cache[file_path] = cached
+        return cached[1]
+
+def get_dividend_field(ticker, column, file_path=FILTERED_DIVIDEND_COMPANY_FILE_PATH):
+    """Value of a column ('No Years', 'DGR 3Y', ...) for a ticker, None if the file or the ticker is missing"""
+    metadata = get_dividend_metadata(file_path)
+    if metadata is None:
+        return None
+    row = metadata.get(ticker)
+    if row is None:
+        return None
+    return row.get(column)
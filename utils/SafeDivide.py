@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 # def safe_divide(numerator, denominator):
@@ -9,31 +10,44 @@ def safe_divide(numerator, denominator):
     # Dacă sunt None, returnează 0
     if numerator is None or denominator is None:
         return 0
-        
-    # Dacă denominator este o serie pandas
-    if isinstance(denominator, pd.Series) or isinstance(denominator, pd.DataFrame):
-        # Copie pentru a evita avertismentul SettingWithCopyWarning
-        result = pd.Series(index=denominator.index, dtype=float)
-        
-        # Dacă numerator este și el o serie, împărțiți element cu element
-        if isinstance(numerator, pd.Series) or isinstance(numerator, pd.DataFrame):
-            for idx in denominator.index:
-                if denominator.loc[idx].item() == 0:  # .item() extrage valoarea scalară
-                    result.loc[idx] = 0
-                else:
-                    result.loc[idx] = numerator.loc[idx] / denominator.loc[idx]
-        else:
-            # Numerator este scalar, denominator este serie
-            for idx in denominator.index:
-                if denominator.loc[idx].item() == 0:
-                    result.loc[idx] = 0
-                else:
-                    result.loc[idx] = numerator / denominator.loc[idx]
-        
-        return result
-    
-    # Ambele sunt scalare
-    if denominator == 0:
-        return 0
-        
-    return numerator / denominator
\ No newline at end of file
+
+    # Denominator scalar (numerator scalar sau vector)
+    if not _is_vector(denominator):
+        if denominator == 0:
+            return 0
+        return numerator / denominator
+
+    # Seriile/DataFrame-urile sunt aliniate după indexul numitorului, valorile lipsă devin NaN
+    if _is_pandas(numerator) and _is_pandas(denominator):
+        axis = None if type(numerator) is type(denominator) else 0
+        numerator, denominator = numerator.align(denominator, join='right', axis=axis)
+
+    numerator_values = np.asarray(numerator, dtype=float)
+    denominator_values = np.asarray(denominator, dtype=float)
+    # O serie împărțită la un DataFrame (sau invers) se aplică pe fiecare coloană
+    if numerator_values.ndim == 1 and denominator_values.ndim == 2:
+        numerator_values = numerator_values[:, None]
+    elif numerator_values.ndim == 2 and denominator_values.ndim == 1:
+        denominator_values = denominator_values[:, None]
+
+    # Împărțire element cu element; 0 unde numitorul este 0, NaN se propagă
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(denominator_values == 0, 0.0, numerator_values / denominator_values)
+
+    return _wrap_result(values, denominator, numerator)
+
+def _is_pandas(value):
+    return isinstance(value, (pd.Series, pd.DataFrame))
+
+def _is_vector(value):
+    return _is_pandas(value) or (isinstance(value, np.ndarray) and value.ndim > 0)
+
+# Rezultatul are forma operandului pandas (DataFrame înaintea seriei, numitorul înaintea numărătorului)
+def _wrap_result(values, denominator, numerator):
+    for operand in (denominator, numerator):
+        if isinstance(operand, pd.DataFrame):
+            return pd.DataFrame(values, index=operand.index, columns=operand.columns)
+    for operand in (denominator, numerator):
+        if isinstance(operand, pd.Series):
+            return pd.Series(values, index=operand.index)
+    return values
@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import timeit
+import numpy as np
+import pandas as pd
+from utils.SafeDivide import safe_divide
+
+# The previous implementation, looping over the index of the denominator
+def loop_safe_divide(numerator, denominator):
+    if numerator is None or denominator is None:
+        return 0
+    if isinstance(denominator, pd.Series) or isinstance(denominator, pd.DataFrame):
+        result = pd.Series(index=denominator.index, dtype=float)
+        if isinstance(numerator, pd.Series) or isinstance(numerator, pd.DataFrame):
+            for idx in denominator.index:
+                if denominator.loc[idx].item() == 0:
+                    result.loc[idx] = 0
+                else:
+                    result.loc[idx] = numerator.loc[idx] / denominator.loc[idx]
+        else:
+            for idx in denominator.index:
+                if denominator.loc[idx].item() == 0:
+                    result.loc[idx] = 0
+                else:
+                    result.loc[idx] = numerator / denominator.loc[idx]
+        return result
+    if denominator == 0:
+        return 0
+    return numerator / denominator
+
+def run_benchmark(size=10_000, repeat=3):
+    rng = np.random.default_rng(0)
+    index = pd.RangeIndex(size)
+    numerator = pd.Series(rng.normal(size=size), index=index)
+    denominator_values = rng.normal(size=size)
+    denominator_values[rng.random(size) < 0.1] = 0
+    denominator = pd.Series(denominator_values, index=index)
+
+    expected = loop_safe_divide(numerator, denominator)
+    result = safe_divide(numerator, denominator)
+    pd.testing.assert_series_equal(result, expected)
+
+    loop_time = min(timeit.repeat(lambda: loop_safe_divide(numerator, denominator), number=1, repeat=repeat))
+    vectorized_time = min(timeit.repeat(lambda: safe_divide(numerator, denominator), number=1, repeat=repeat))
+    print(f"Series / Series with {size} elements")
+    print(f"  loop:       {loop_time * 1000:.2f} ms")
+    print(f"  vectorized: {vectorized_time * 1000:.2f} ms")
+    print(f"  speedup:    {loop_time / vectorized_time:.0f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -30,13 +30,13 @@ def insert_daily_prices():
         print(f"Latest database version of {cnst.DB_NAME} was downloaded successfully at {database_path}")
         time.sleep(20)
         db_crud = DatabaseCRUD()
+        # baza de date locală a fost înlocuită cu cea descărcată: columnar price store-ul este exportat din nou
+        # din ea, iar bulk insert-ul de mai jos adaugă ziua nouă în fișierele existente
+        db_crud.sync_price_store(rebuild=True)
         yestarday = pd.Timestamp.today() - pd.Timedelta(days=days_lag)
         formatted_yestarday = yestarday.strftime("%Y-%m-%d")
-        for index, row in df.iterrows():
-            date = formatted_yestarday
-            for company, price in row.items():
-                print(f"Inserting price {price} for {company} on {date}...")
-                db_crud.insert_price(company, date, price)
+        print(f"Inserting {df.size} prices on {formatted_yestarday}...")
+        db_crud.bulk_insert_prices(df, date=formatted_yestarday)
         
         db_connection.close_connection()
         print(f"Daily prices inserted successfully into database {cnst.DB_NAME}.")